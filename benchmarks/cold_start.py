@@ -0,0 +1,102 @@
+"""Cold start time of create_app() against a budget
+
+Starts fresh interpreters that import src.main and build the app, and
+reports the median time to a ready app, split into imports and the
+create_app() phases (StartupProfile). One extra run under `-X importtime`
+lists the packages and modules that cost the most to import. Exits 1 when
+the median goes over --budget-ms, so CI can fail a change that slows cold
+start down.
+
+Run from the repository root:
+    python -m benchmarks.cold_start --runs 5 --budget-ms 1200
+    python -m benchmarks.cold_start --create-all  # DB_CREATE_ALL=true
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CHILD = '''
+import json, time
+started = time.perf_counter()
+from src.main import create_app
+app = create_app()
+print(json.dumps(dict(app.extensions['startup'].to_dict(), ready_ms=round((time.perf_counter() - started) * 1000, 1))))
+'''
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help='Fresh interpreters to time')
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('COLD_START_BUDGET_MS', '1200')),
+                        help='Fail when the median import + create_app time exceeds this')
+    parser.add_argument('--create-all', action='store_true', help='Run with DB_CREATE_ALL=true')
+    parser.add_argument('--top', type=int, default=15, help='Modules to list from the import profile')
+    return parser.parse_args(argv)
+
+
+def run_child(env, importtime=False):
+    """Start one interpreter, return (startup dict, process wall ms, stderr)"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', CHILD]
+    start = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True, check=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return json.loads(result.stdout.strip().splitlines()[-1]), wall_ms, result.stderr
+
+
+def parse_importtime(stderr):
+    """[(self_us, cumulative_us, module)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    env = dict(os.environ)
+    env.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='cold-start-'), 'app.db')}")
+    env.setdefault('JOB_WORKER_THREADS', '0')
+    if args.create_all:
+        env['DB_CREATE_ALL'] = 'true'
+
+    run_child(env)  # warm the OS file cache and .pyc files, like any real host
+    runs = [run_child(env) for _ in range(args.runs)]
+    ready = statistics.median(data['ready_ms'] for data, _, _ in runs)
+    wall = statistics.median(wall_ms for _, wall_ms, _ in runs)
+    median_run = min(runs, key=lambda run: abs(run[0]['ready_ms'] - ready))[0]
+
+    print(f"runs={args.runs} create_all={args.create_all} budget={args.budget_ms:.0f}ms")
+    print(f"  ready (imports + create_app): {ready:.1f}ms median, process wall {wall:.1f}ms")
+    print(f"  imports {median_run['imports_ms']}ms, create_app {median_run['create_app_ms']}ms")
+    for name, ms in median_run['phases_ms'].items():
+        print(f"    {name:<14} {ms:8.1f}ms")
+
+    rows = parse_importtime(run_child(env, importtime=True)[2])
+    packages = {}
+    for self_us, _, name in rows:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    print("  import time by package (summed self time, inflated by -X importtime):")
+    for package, us in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"    {package:<24} {us / 1000:8.1f}ms")
+    print("  slowest modules (self time):")
+    for self_us, _, name in sorted(rows, reverse=True)[:args.top]:
+        print(f"    {name:<48} {self_us / 1000:8.1f}ms")
+
+    if ready > args.budget_ms:
+        print(f"FAIL: cold start {ready:.1f}ms is over the {args.budget_ms:.0f}ms budget")
+        return 1
+    print(f"ok: cold start {ready:.1f}ms is within the {args.budget_ms:.0f}ms budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Bytes saved and CPU cost of response compression
+
+Seeds an in-memory SQLite database with a platform catalog and a user with
+many links, then for the platform list, own profile and public profile
+payloads reports the compressed size and compression time for each gzip
+level / brotli quality, and the per-request cost of the compressed-body
+cache on a cacheable endpoint.
+
+Run from the repository root:
+    python -m benchmarks.compression --links 15 --platforms 30
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=15, help='Links on the benchmarked user')
+    parser.add_argument('--platforms', type=int, default=30, help='Platforms in the catalog')
+    parser.add_argument('--iterations', type=int, default=500, help='Repetitions per measurement')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    os.environ.setdefault('DB_CREATE_ALL', 'true')
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    os.environ.setdefault('JOB_WORKER_THREADS', '0')
+    os.environ.setdefault('EMAIL_FILTER_ENABLED', 'false')
+    os.environ.setdefault('BCRYPT_ROUNDS', '4')
+
+    from src.main import create_app
+    from src.models.models import db, User
+    from src.middleware.compression import Compressor, brotli, compressor
+
+    app = create_app()
+    client = app.test_client()
+
+    admin = client.post('/api/auth/signup', json={'email': 'bench@example.com', 'password': 'benchmark'}).get_json()
+    with app.app_context():
+        db.session.get(User, uuid.UUID(admin['user']['id'])).is_admin = True
+        db.session.commit()
+    token = client.post('/api/auth/login', json={'email': 'bench@example.com', 'password': 'benchmark'}).get_json()['token']
+    auth = {'Authorization': f'Bearer {token}'}
+
+    platform_ids = []
+    for i in range(args.platforms):
+        platform = client.post('/api/platforms/add', headers=auth, json={
+            'name': f'Platform {i}',
+            'lightIcon': f'https://cdn.example.com/icons/platform-{i}/light/icon-256x256.svg',
+            'darkIcon': f'https://cdn.example.com/icons/platform-{i}/dark/icon-256x256.svg',
+            'previewColor': '#1A1A2E',
+        }).get_json()['platform']
+        platform_ids.append(platform['id'])
+    client.put('/api/auth/profile', headers=auth, json={
+        'firstName': 'Bench', 'lastName': 'User',
+        'links': [{'platform_id': platform_ids[i % len(platform_ids)], 'url': f'https://example.com/bench-user/{i}'}
+                  for i in range(args.links)],
+    })
+
+    payloads = {
+        'platform list': client.get('/api/platforms/').get_data(),
+        'own profile': client.get('/api/auth/profile', headers=auth).get_data(),
+        'public profile': client.get(f"/api/users/{admin['user']['id']}/public").get_data(),
+    }
+
+    settings = [('gzip', level) for level in (1, 6, 9)]
+    if brotli is not None:
+        settings += [('br', quality) for quality in (1, 5, 11)]
+
+    print(f"links={args.links} platforms={args.platforms} iterations={args.iterations}")
+    for name, data in payloads.items():
+        print(f"  {name}: {len(data)} bytes")
+        for encoding, level in settings:
+            c = Compressor(min_size=0, gzip_level=level, brotli_quality=level, cache_size=0)
+            body = c.compress(data, encoding)
+            seconds = timeit.timeit(lambda: c.compress(data, encoding), number=args.iterations) / args.iterations
+            saved = len(data) - len(body)
+            print(f"    {encoding:<4} {level:>2}  {len(body):>6} bytes  saved {saved:>6} ({saved / len(data):5.1%})  "
+                  f"{seconds * 1e6:8.1f}us")
+
+    # Cacheable endpoint end to end: first hit compresses, later hits reuse the bytes
+    encoding = compressor.encodings[0]
+    compressor.clear()
+    headers = {'Accept-Encoding': encoding}
+    profile_url = f"/api/users/{admin['user']['id']}/public"
+    cold = client.get(profile_url, headers=headers)
+    hit = timeit.timeit(lambda: client.get(profile_url, headers=headers), number=args.iterations) / args.iterations
+    identity = timeit.timeit(lambda: client.get(profile_url), number=args.iterations) / args.iterations
+    print(f"  public profile request ({encoding}, cached body): {hit * 1e6:.1f}us vs identity {identity * 1e6:.1f}us, "
+          f"{len(cold.get_data())} of {len(payloads['public profile'])} bytes on the wire")
+    stats = compressor.stats[encoding]
+    print(f"  compressor: {stats.responses} responses, {stats.cache_hits} cache hits, "
+          f"{stats.bytes_in - stats.bytes_out} bytes saved")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Throughput and memory of the link health checker against a local stub server
+
+Seeds a throwaway SQLite database with links pointing at a local HTTP
+stub (healthy, slow, 404, redirecting and HEAD-refusing URLs), runs
+LinkChecker over all of them and reports links/second, the outcome counts and
+the peak Python heap. Peak memory should stay about the same whether --links
+is 1000 or 100000.
+
+Run from the repository root:
+    python -m benchmarks.link_checker --links 5000 --concurrency 100 --slow-ms 50
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from http import HTTPStatus
+
+# Path -> share of the seeded links
+PATHS = (('/ok', 6), ('/slow', 1), ('/missing', 1), ('/moved', 1), ('/no-head', 1))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=5000, help='Links to seed and check')
+    parser.add_argument('--concurrency', type=int, default=100, help='Requests in flight')
+    parser.add_argument('--per-host', type=int, default=100, help='Connections per host (all links share one)')
+    parser.add_argument('--batch-size', type=int, default=1000, help='Rows per fetch/upsert')
+    parser.add_argument('--slow-ms', type=int, default=50, help='Latency of the /slow endpoint')
+    parser.add_argument('--timeout', type=float, default=5, help='Per-request timeout in seconds')
+    return parser.parse_args(argv)
+
+
+def serve_stub(slow_ms, ports):
+    """Run the stub HTTP/1.1 server on a free port
+
+    asyncio based and in its own process, so neither a thread per keep-alive
+    connection nor the checker's own GIL use limits the measured throughput.
+    """
+    body = b'<html>ok</html>' * 100
+
+    async def respond(writer, method, status, headers=()):
+        payload = body if status == 200 else b''
+        head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}', f'Content-Length: {len(payload)}']
+        head += [f'{name}: {value}' for name, value in headers]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(payload)
+        await writer.drain()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request = await reader.readuntil(b'\r\n\r\n')
+                method, target = request.split(b' ', 2)[:2]
+                method, path = method.decode(), target.decode().split('?')[0]
+                if path == '/slow':
+                    await asyncio.sleep(slow_ms / 1000)
+                if path == '/no-head' and method == 'HEAD':
+                    await respond(writer, method, 405)
+                elif path in ('/ok', '/slow', '/no-head'):
+                    await respond(writer, method, 200, [('Content-Type', 'text/html')])
+                elif path == '/moved':
+                    await respond(writer, method, 301, [('Location', '/ok')])
+                else:
+                    await respond(writer, method, 404)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=1024)
+        ports.put(server.sockets[0].getsockname()[1])
+        await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    db_dir = tempfile.mkdtemp(prefix='link-checker-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(db_dir, 'bench.db')}"
+    os.environ.setdefault('DB_CREATE_ALL', 'true')
+    os.environ.setdefault('JOB_WORKER_THREADS', '0')
+
+    from src.main import create_app
+    from src.models.models import db, User, Platform, UserLink, LinkHealth
+    from src.database.link_checker import LinkChecker
+
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve_stub, args=(args.slow_ms, ports), daemon=True)
+    server.start()
+    base = f'http://127.0.0.1:{ports.get(timeout=10)}'
+    app = create_app()
+
+    with app.app_context():
+        # WAL: the streaming reader must not block the result upserts
+        db.session.execute(db.text('PRAGMA journal_mode=WAL'))
+        user = User(email='bench@example.com', password='x')
+        platform = Platform(name='Bench', lightIcon='a', darkIcon='b', previewColor='#000')
+        db.session.add_all([user, platform])
+        db.session.commit()
+
+        paths = [path for path, share in PATHS for _ in range(share)]
+        now = datetime.now(timezone.utc)
+        for start in range(0, args.links, 5000):
+            db.session.execute(db.insert(UserLink.__table__), [
+                {'id': uuid.uuid4(), 'user_id': user.id, 'platform_id': platform.id, 'position': i,
+                 'url': f'{base}{paths[i % len(paths)]}?link={i}', 'created_at': now}
+                for i in range(start, min(start + 5000, args.links))
+            ])
+        db.session.commit()
+
+        checker = LinkChecker(concurrency=args.concurrency, per_host=args.per_host, timeout=args.timeout,
+                              batch_size=args.batch_size, allow_private=True)
+        tracemalloc.start()
+        summary = checker.run(max_age=0)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        recorded = db.session.execute(db.select(db.func.count()).select_from(LinkHealth)).scalar()
+        # A second pass finds nothing due
+        again = checker.run(max_age=3600)
+
+    server.terminate()
+    print(f"links={args.links} concurrency={args.concurrency} per_host={args.per_host} "
+          f"batch_size={args.batch_size} slow_ms={args.slow_ms}")
+    print(json.dumps(summary.to_dict(), indent=2))
+    print(f"peak Python heap during the run: {peak / 1024 / 1024:.1f} MiB")
+    print(f"link_health rows: {recorded}, rechecked within max-age: {again.checked}")
+    return 0 if recorded == args.links and again.checked == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+"""Load benchmark for the auth, profile and public listing endpoints
+
+Boots create_app() against DATABASE_URL (a throwaway SQLite file if unset),
+seeds users/platforms/links, then drives each scenario from a thread pool and
+reports throughput, latency percentiles and SQL statements per request.
+Results are written as JSON; pass --compare to fail on regressions.
+
+Run from the repository root:
+    python -m benchmarks.load --users 500 --links 8 --requests 300 --output bench.json
+    python -m benchmarks.load --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform as host_platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SCENARIOS = ('login', 'signup', 'profile_get', 'profile_put', 'user_listing', 'public_profile')
+PASSWORD = 'benchmark-password'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200, help='Users to seed')
+    parser.add_argument('--platforms', type=int, default=20, help='Platforms to seed')
+    parser.add_argument('--links', type=int, default=5, help='Links per seeded user')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4, help='Client threads')
+    parser.add_argument('--bcrypt-rounds', type=int, default=4,
+                        help='bcrypt cost used while benchmarking (production default is 12)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma separated subset to run')
+    parser.add_argument('--output', help='Write results JSON here')
+    parser.add_argument('--compare', help='Baseline results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Allowed relative p50/p99 slowdown before a scenario counts as regressed')
+    return parser.parse_args(argv)
+
+
+class StatementCounter:
+    """Counts SQL statements per client thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, 'count', 0)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.count = getattr(self._local, 'count', 0) + 1
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def seed(app, args):
+    """Create platforms and users with links, return the seeded emails and platform ids"""
+    from src.models.models import db, Platform
+    from src.database.platform_cache import platform_catalog
+    from src.database.bulk import import_users
+
+    with app.app_context():
+        platforms = [
+            Platform(
+                name=f'Platform {i}',
+                lightIcon=f'https://icons.example.com/{i}-light.svg',
+                darkIcon=f'https://icons.example.com/{i}-dark.svg',
+                previewColor='#333333'
+            )
+            for i in range(args.platforms)
+        ]
+        db.session.add_all(platforms)
+        db.session.commit()
+        platform_ids = [str(p.id) for p in platforms]
+        platform_catalog.invalidate()
+
+        emails = [f'seed{i}@bench.example.com' for i in range(args.users)]
+        rows = (
+            (i, {
+                'email': email,
+                'password': PASSWORD,
+                'firstName': 'Seed',
+                'lastName': str(i),
+                'links': [
+                    {'platform_id': platform_ids[(i + j) % len(platform_ids)], 'url': f'https://example.com/{i}/{j}'}
+                    for j in range(args.links)
+                ]
+            })
+            for i, email in enumerate(emails)
+        )
+        import_users(rows, processes=1)
+
+    return emails, platform_ids
+
+
+def build_scenarios(app, emails, platform_ids, args):
+    """Return {name: callable(client, i, slot) -> response}
+
+    `slot` is the client thread's index; authenticated scenarios use one user
+    per thread so concurrent requests never edit the same profile.
+    """
+    client = app.test_client()
+    tokens = []
+    user_ids = []
+    for email in emails[:max(1, min(len(emails), args.concurrency))]:
+        data = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD}).get_json()
+        tokens.append(data['token'])
+        user_ids.append(data['user']['id'])
+
+    def headers(slot):
+        return {'Authorization': f'Bearer {tokens[slot % len(tokens)]}'}
+
+    def links(i):
+        count = max(1, args.links)
+        order = list(range(count))
+        # Rotate the order so consecutive saves exercise reorders and edits
+        order = order[i % count:] + order[:i % count]
+        return [
+            {'platform_id': platform_ids[(k + i) % len(platform_ids)], 'url': f'https://example.com/put/{k}'}
+            for k in order
+        ]
+
+    run_id = int(time.time() * 1000)
+    return {
+        'login': lambda c, i, slot: c.post('/api/auth/login', json={'email': emails[i % len(emails)], 'password': PASSWORD}),
+        'signup': lambda c, i, slot: c.post('/api/auth/signup', json={'email': f'new{run_id}-{i}@bench.example.com', 'password': PASSWORD}),
+        'profile_get': lambda c, i, slot: c.get('/api/auth/profile', headers=headers(slot)),
+        'profile_put': lambda c, i, slot: c.put('/api/auth/profile', json={'firstName': f'Bench {i}', 'links': links(i)}, headers=headers(slot)),
+        'user_listing': lambda c, i, slot: c.get('/api/users/', query_string={'limit': 20, 'include_link_count': 'true'}),
+        'public_profile': lambda c, i, slot: c.get(f'/api/users/{user_ids[i % len(user_ids)]}/public'),
+    }
+
+
+def run_scenario(app, name, call, counter, args):
+    local = threading.local()
+    samples = []
+    samples_lock = threading.Lock()
+    slots = iter(range(args.concurrency))
+
+    def one(i):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+            with samples_lock:
+                local.slot = next(slots)
+        counter.reset()
+        start = time.perf_counter()
+        response = call(local.client, i, local.slot)
+        elapsed = time.perf_counter() - start
+        with samples_lock:
+            samples.append((elapsed, response.status_code, counter.count))
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one, range(args.requests)))
+    wall = time.perf_counter() - wall_start
+
+    latencies = [s[0] for s in samples]
+    statements = [s[2] for s in samples]
+    errors = sum(1 for s in samples if s[1] >= 400)
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput_rps': round(len(samples) / wall, 2),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 3),
+            'p50': round(percentile(latencies, 0.50) * 1000, 3),
+            'p90': round(percentile(latencies, 0.90) * 1000, 3),
+            'p99': round(percentile(latencies, 0.99) * 1000, 3),
+            'max': round(max(latencies) * 1000, 3),
+        },
+        'queries_per_request': {
+            'mean': round(statistics.mean(statements), 2),
+            'max': max(statements),
+        },
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Print a comparison table, return the names of regressed scenarios"""
+    regressed = []
+    for name, current in results['scenarios'].items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        reasons = []
+        for key in ('p50', 'p99'):
+            if current['latency_ms'][key] > base['latency_ms'][key] * (1 + threshold):
+                reasons.append(f"{key} {base['latency_ms'][key]}ms -> {current['latency_ms'][key]}ms")
+        if current['queries_per_request']['max'] > base['queries_per_request']['max']:
+            reasons.append(f"queries {base['queries_per_request']['max']} -> {current['queries_per_request']['max']}")
+        if current['errors'] > base['errors']:
+            reasons.append(f"errors {base['errors']} -> {current['errors']}")
+        print(f"  {name:<16} {'REGRESSED: ' + '; '.join(reasons) if reasons else 'ok'}")
+        if reasons:
+            regressed.append(name)
+    return regressed
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Must be set before the app modules read them at import time
+    os.environ['BCRYPT_ROUNDS'] = str(args.bcrypt_rounds)
+    os.environ.setdefault('PASSWORD_HASH_QUEUE', str(args.concurrency * 4))
+    # One process serves every request here, so bcrypt may use all the CPUs
+    os.environ.setdefault('WEB_CONCURRENCY', '1')
+    # Every benchmark request comes from one IP; measure the handlers, not the limiter
+    os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+    database_file = None
+    if not os.getenv('DATABASE_URL'):
+        database_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False).name
+        os.environ['DATABASE_URL'] = f'sqlite:///{database_file}'
+    os.environ.setdefault('DB_CREATE_ALL', 'true')
+
+    from sqlalchemy import event
+    from src.main import create_app
+    from src.models.models import db
+
+    try:
+        app = create_app()
+        emails, platform_ids = seed(app, args)
+        scenarios = build_scenarios(app, emails, platform_ids, args)
+
+        counter = StatementCounter()
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', counter)
+            dialect = db.engine.dialect.name
+
+        results = {
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'machine': host_platform.platform(),
+            'database': dialect,
+            'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+            'scenarios': {},
+        }
+
+        for name in [s.strip() for s in args.scenarios.split(',') if s.strip()]:
+            results['scenarios'][name] = run_scenario(app, name, scenarios[name], counter, args)
+            summary = results['scenarios'][name]
+            print(f"{name:<16} {summary['throughput_rps']:>9} req/s  "
+                  f"p50 {summary['latency_ms']['p50']:>8}ms  p99 {summary['latency_ms']['p99']:>8}ms  "
+                  f"queries {summary['queries_per_request']['mean']:>5}  errors {summary['errors']}")
+    finally:
+        if database_file:
+            os.unlink(database_file)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
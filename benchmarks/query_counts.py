@@ -0,0 +1,108 @@
+"""Statements-per-endpoint check for the profile endpoints
+
+Seeds a user with a small and a large number of links, calls every endpoint
+that serializes a profile and fails (exit code 1) if the number of SQL
+statements grows with the number of links.
+
+Run from the repository root:
+    python -m benchmarks.query_counts
+    DATABASE_URL=postgresql://... python -m benchmarks.query_counts
+"""
+import os
+import sys
+
+# Use a disposable in-memory database unless one is given explicitly
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('DB_CREATE_ALL', 'true')
+# Jobs stay queued and the email filter unloaded: background threads would
+# share the single in-memory connection
+os.environ.setdefault('JOB_WORKER_THREADS', '0')
+os.environ.setdefault('EMAIL_FILTER_ENABLED', 'false')
+
+from src.main import create_app
+from src.models.models import db, User, Platform, UserLink
+from src.database.query_counter import count_queries
+
+SMALL_LINKS = 1
+LARGE_LINKS = 15
+PASSWORD = 'benchmark-password'
+
+
+def seed_user(email, link_count):
+    """Create a user with `link_count` links, each on its own platform"""
+    user = User(email=email)
+    user.set_password(PASSWORD)
+    db.session.add(user)
+    platforms = []
+    for i in range(link_count):
+        platform = Platform(
+            name=f'Platform {i}',
+            lightIcon=f'https://icons.example.com/{i}-light.svg',
+            darkIcon=f'https://icons.example.com/{i}-dark.svg',
+            previewColor='#000000'
+        )
+        platforms.append(platform)
+        db.session.add(platform)
+    db.session.flush()
+    for i, platform in enumerate(platforms):
+        db.session.add(UserLink(
+            user_id=user.id,
+            platform_id=platform.id,
+            url=f'https://example.com/{email}/{i}'
+        ))
+    db.session.commit()
+    return [str(p.id) for p in platforms]
+
+
+def measure(app, email, platform_ids):
+    """Return {endpoint: statement count} for one seeded user"""
+    client = app.test_client()
+    counts = {}
+
+    with app.app_context():
+        with count_queries() as counter:
+            response = client.post('/api/auth/login', json={'email': email, 'password': PASSWORD})
+        assert response.status_code == 200, response.get_json()
+        counts['POST /api/auth/login'] = counter.count
+        headers = {'Authorization': f"Bearer {response.get_json()['token']}"}
+
+        with count_queries() as counter:
+            response = client.get('/api/auth/profile', headers=headers)
+        assert response.status_code == 200, response.get_json()
+        counts['GET /api/auth/profile'] = counter.count
+
+        links = [
+            {'platform_id': platform_id, 'url': f'https://example.com/updated/{i}'}
+            for i, platform_id in enumerate(platform_ids)
+        ]
+        with count_queries() as counter:
+            response = client.put('/api/auth/profile', json={'firstName': 'Bench', 'links': links}, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        counts['PUT /api/auth/profile'] = counter.count
+
+    return counts
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        small_platforms = seed_user('small@example.com', SMALL_LINKS)
+        large_platforms = seed_user('large@example.com', LARGE_LINKS)
+
+    small = measure(app, 'small@example.com', small_platforms)
+    large = measure(app, 'large@example.com', large_platforms)
+
+    failed = False
+    for endpoint in small:
+        status = 'ok'
+        if large[endpoint] > small[endpoint]:
+            status = 'GROWS WITH LINKS'
+            failed = True
+        print(f'{endpoint:<28} {SMALL_LINKS:>2} links: {small[endpoint]:>3}  '
+              f'{LARGE_LINKS:>2} links: {large[endpoint]:>3}  {status}')
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
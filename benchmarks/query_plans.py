@@ -0,0 +1,93 @@
+"""Query-plan check: the hot query shapes must be able to use their indexes
+
+Builds the same statements the app issues (links by user in display order,
+login by lower(email), the keyset user listing, links by platform), runs
+EXPLAIN on each and fails (exit code 1) if the expected index is missing from
+the plan. On Postgres sequential scans are disabled for the check, so a tiny
+table can't hide a missing or unusable index.
+
+Run from the repository root:
+    python -m benchmarks.query_plans
+    DATABASE_URL=postgresql://... DB_CREATE_ALL=false python -m benchmarks.query_plans
+"""
+import os
+import sys
+import uuid
+from datetime import datetime
+
+# Use a disposable in-memory database unless one is given explicitly
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+os.environ.setdefault('DB_CREATE_ALL', 'true')
+
+from sqlalchemy import select
+from src.main import create_app
+from src.models.models import db, User, UserLink
+
+
+def hot_queries():
+    """(description, statement, expected index) for every checked access path"""
+    some_id = uuid.uuid4()
+    return [
+        (
+            'profile links (selectin load)',
+            select(UserLink).where(UserLink.user_id.in_([some_id])).order_by(UserLink.position),
+            'ix_user_links_user_id_position',
+        ),
+        (
+            'delete a user\'s links',
+            select(UserLink.id).where(UserLink.user_id == some_id),
+            'ix_user_links_user_id_position',
+        ),
+        (
+            'platform in use',
+            select(UserLink.id).where(UserLink.platform_id == some_id).limit(1),
+            'ix_user_links_platform_id',
+        ),
+        (
+            'login by email',
+            select(User).where(db.func.lower(User.email) == 'someone@example.com'),
+            'ix_users_email_lower',
+        ),
+        (
+            'user listing page',
+            select(User.id, User.firstName, User.lastName, User.image, User.created_at)
+            .where(db.tuple_(User.created_at, User.id) > (datetime(2024, 1, 1), some_id))
+            .order_by(User.created_at, User.id).limit(21),
+            'ix_users_created_at_id',
+        ),
+    ]
+
+
+def explain(conn, statement):
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True})
+    prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+    rows = conn.exec_driver_sql(prefix + str(sql)).fetchall()
+    # Postgres: one text column per row; SQLite: (id, parent, notused, detail)
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def main():
+    app = create_app()
+    failures = 0
+    with app.app_context():
+        with db.engine.connect() as conn:
+            dialect = conn.dialect.name
+            if dialect == 'postgresql':
+                conn.exec_driver_sql('SET enable_seqscan = off')
+            print(f"Query plans on {dialect}:")
+            for description, statement, index in hot_queries():
+                plan = explain(conn, statement)
+                ok = index in plan
+                failures += not ok
+                print(f"  {description:<32} {index:<32} {'ok' if ok else 'MISSING'}")
+                if not ok:
+                    print('    ' + plan.replace('\n', '\n    '))
+
+    if failures:
+        print(f"{failures} query shape(s) do not use their index")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
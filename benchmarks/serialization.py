@@ -0,0 +1,101 @@
+"""Micro-benchmark: to_dict() + stdlib jsonify vs compiled schemas + orjson
+
+Seeds an in-memory SQLite database with one user and N links, loads the user
+once, then times only serialization of the profile, public profile and
+platform list payloads on both paths.
+
+Run from the repository root:
+    python -m benchmarks.serialization --links 10 --iterations 20000
+"""
+import argparse
+import os
+import sys
+import timeit
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--links', type=int, default=10, help='Links on the benchmarked user')
+    parser.add_argument('--platforms', type=int, default=20, help='Platforms in the catalog')
+    parser.add_argument('--iterations', type=int, default=10000, help='Serializations per case')
+    return parser.parse_args(argv)
+
+
+def seed(args):
+    from src.models.models import db, Platform, User, UserLink
+
+    platforms = [
+        Platform(name=f'Platform {i}', lightIcon=f'https://icons.example.com/{i}-light.svg',
+                 darkIcon=f'https://icons.example.com/{i}-dark.svg', previewColor='#333333')
+        for i in range(args.platforms)
+    ]
+    db.session.add_all(platforms)
+    user = User(email='bench@example.com', firstName='Bench', lastName='User', password='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add_all(
+        UserLink(user_id=user.id, platform_id=platforms[i % len(platforms)].id,
+                 url=f'https://example.com/{i}', position=i)
+        for i in range(args.links)
+    )
+    db.session.commit()
+    return db.session.get(User, user.id)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    os.environ.setdefault('DB_CREATE_ALL', 'true')
+    os.environ.setdefault('JOB_WORKER_THREADS', '0')
+    os.environ.setdefault('EMAIL_FILTER_ENABLED', 'false')
+
+    from flask.json.provider import DefaultJSONProvider
+    from src.main import create_app
+    from src.models.models import Platform
+    from src.models import serializers
+    from src.models.serializers import FastJSONProvider, PLATFORM_SCHEMA, PUBLIC_USER_SCHEMA, USER_SCHEMA
+    from src.database.platform_cache import platform_catalog
+
+    app = create_app()
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    with app.app_context():
+        user = seed(args)
+        platform_catalog.invalidate()
+        platforms = list(platform_catalog.all())
+        user.user_links  # load links once; only serialization is timed
+        platform_rows = Platform.query.all()
+
+        cases = {
+            'profile': (
+                lambda: stdlib.dumps({'user': user.to_dict()}),
+                lambda: fast.dumps({'user': USER_SCHEMA.dump(user)}),
+            ),
+            'public_profile': (
+                lambda: stdlib.dumps({'user': user.to_public_dict()}),
+                lambda: serializers.dumps_json({'user': PUBLIC_USER_SCHEMA.dump(user)}),
+            ),
+            'platform_list': (
+                lambda: stdlib.dumps({'platforms': [p.to_dict() for p in platform_rows]}),
+                lambda: serializers.dumps_json({'platforms': PLATFORM_SCHEMA.dump_many(platform_rows)}),
+            ),
+            'platform_list_cached': (
+                lambda: stdlib.dumps({'platforms': platforms}),
+                lambda: serializers.dumps_json({'platforms': platforms}),
+            ),
+        }
+
+        encoder = 'orjson' if serializers.orjson is not None else 'stdlib json (orjson not installed)'
+        print(f"links={args.links} platforms={args.platforms} iterations={args.iterations} encoder={encoder}")
+        for name, (baseline, candidate) in cases.items():
+            before = timeit.timeit(baseline, number=args.iterations) / args.iterations
+            after = timeit.timeit(candidate, number=args.iterations) / args.iterations
+            print(f"  {name:<22} to_dict+jsonify {before * 1e6:>8.1f}us   "
+                  f"schema+fast {after * 1e6:>8.1f}us   x{before / after:.2f}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Production server: gunicorn -c gunicorn.conf.py src.wsgi:app
+
+The master imports and builds the app once (preload_app), applies migrations
+before any worker exists, then forks workers that share the preloaded code
+copy-on-write. Each worker drops the DB connections it inherited and logs its
+boot time and memory. Next to the web workers the master forks
+JOB_WORKER_PROCESSES background job processes (JOB_WORKER_PROCESS_THREADS
+threads each); set it to 0 when `flask jobs work` runs elsewhere.
+
+Reloading:
+    kill -HUP <master>     graceful restart of workers (config changes)
+    kill -USR2 <master>    start a new master with new code, then
+    kill -TERM <old master> once the new one is serving
+"""
+import gc
+import multiprocessing
+import os
+import resource
+import signal
+import time
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('WEB_THREADS', '1'))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.getenv('WEB_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('WEB_KEEPALIVE', '5'))
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '0'))
+preload_app = True
+
+JOB_WORKER_PROCESSES = int(os.getenv('JOB_WORKER_PROCESSES', '1'))
+JOB_WORKER_PROCESS_THREADS = int(os.getenv('JOB_WORKER_PROCESS_THREADS', '2'))
+_job_workers = []
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def _memory_kb():
+    """(rss_kb, pss_kb) of this process - PSS counts shared pages proportionally"""
+    rss = pss = None
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Rss:'):
+                    rss = int(line.split()[1])
+                elif line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss, pss
+
+
+def on_starting(server):
+    """Pre-fork: migrate (or just check) the schema once, in the master"""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+    from flask_migrate import upgrade
+    from src.models.models import db
+    from src.startup import ensure_migrate, stamp_existing_schema
+
+    app = server.app.wsgi()
+    # create_app() doesn't set up Flask-Migrate, upgrade() needs it
+    migrate = ensure_migrate(app, db)
+    with app.app_context():
+        if os.getenv('RUN_MIGRATIONS', 'true').lower() in ('1', 'true', 'yes', 'on'):
+            # A schema built by db.create_all() gets its revision recorded
+            # first, or upgrade() would try to create its tables again
+            stamped = stamp_existing_schema(app, db, directory=MIGRATIONS_DIRECTORY)
+            if stamped:
+                server.log.info("Unversioned database stamped at %s", stamped)
+            upgrade(directory=MIGRATIONS_DIRECTORY)
+            server.log.info("Database migrations applied")
+        else:
+            config = migrate.migrate.get_config(MIGRATIONS_DIRECTORY)
+            expected = set(ScriptDirectory.from_config(config).get_heads())
+            with db.engine.connect() as connection:
+                applied = set(MigrationContext.configure(connection).get_current_heads())
+            if applied != expected:
+                server.log.warning(
+                    "Database schema is at %s but the code expects %s - run 'flask db upgrade'",
+                    sorted(applied) or 'no revision', sorted(expected)
+                )
+        # Workers must not share the master's connections
+        db.engine.dispose()
+
+
+def when_ready(server):
+    # Move everything imported so far out of the GC's generations so collections
+    # in workers don't touch (and un-share) the preloaded objects
+    gc.freeze()
+    rss, pss = _memory_kb()
+    server.log.info("Master ready, RSS %.1f MB", (rss or 0) / 1024)
+
+    app = server.app.wsgi()
+    for _ in range(JOB_WORKER_PROCESSES):
+        # A bare fork: web workers forked later must not inherit multiprocessing
+        # bookkeeping about this child
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_job_worker(app, JOB_WORKER_PROCESS_THREADS)
+            finally:
+                os._exit(0)
+        _job_workers.append(pid)
+    if _job_workers:
+        server.log.info("Started %d job worker process(es) x %d thread(s)", len(_job_workers), JOB_WORKER_PROCESS_THREADS)
+
+
+def _run_job_worker(app, threads):
+    """Body of a job worker process forked from the master"""
+    from src.database.jobs import job_queue
+    from src.models.models import db
+
+    # The master's signal handlers came along with the fork
+    for sig in (signal.SIGHUP, signal.SIGQUIT, signal.SIGUSR1, signal.SIGUSR2, signal.SIGWINCH,
+                signal.SIGCHLD, signal.SIGTTIN, signal.SIGTTOU):
+        signal.signal(sig, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    with app.app_context():
+        db.engine.dispose(close=False)
+    job_queue.work(app, threads)
+
+
+def on_exit(server):
+    # Reap the job workers here, not in the master's SIGCHLD handler
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    for pid in _job_workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+    deadline = time.monotonic() + graceful_timeout
+    for pid in _job_workers:
+        try:
+            while os.waitpid(pid, os.WNOHANG) == (0, 0):
+                if time.monotonic() > deadline:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    break
+                time.sleep(0.1)
+        except ChildProcessError:
+            pass  # already reaped
+
+
+def post_fork(server, worker):
+    from src.models.models import db
+
+    worker.boot_started = time.perf_counter()
+    app = server.app.wsgi()
+    with app.app_context():
+        # Leave any inherited pooled connections to the parent, open fresh ones
+        db.engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    rss, pss = _memory_kb()
+    worker.log.info(
+        "Worker %s booted in %.1fms, RSS %.1f MB, PSS %s",
+        worker.pid,
+        (time.perf_counter() - worker.boot_started) * 1000,
+        (rss or 0) / 1024,
+        f"{pss / 1024:.1f} MB" if pss is not None else "n/a"
+    )
@@ -0,0 +1,36 @@
+"""add user_links.position
+
+Revision ID: 8a4e6c0f2d31
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-17 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6c0f2d31'
+down_revision = '3f1c2a9d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('user_links', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('position', sa.Integer(), server_default='0', nullable=False))
+
+    # Keep the current display order (insertion order) for existing links
+    op.execute("""
+        UPDATE user_links SET position = ordered.rn
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at, id) - 1 AS rn
+            FROM user_links
+        ) AS ordered
+        WHERE user_links.id = ordered.id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('user_links', schema=None) as batch_op:
+        batch_op.drop_column('position')
@@ -0,0 +1,33 @@
+"""daily click counts per link
+
+Revision ID: a7d3e1b94c62
+Revises: f19c6d3e8a27
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d3e1b94c62'
+down_revision = 'f19c6d3e8a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('link_clicks_daily',
+    sa.Column('link_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('clicks', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('link_id', 'day')
+    )
+    op.create_index('ix_link_clicks_daily_user_id_day', 'link_clicks_daily', ['user_id', 'day'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_link_clicks_daily_user_id_day', table_name='link_clicks_daily')
+    op.drop_table('link_clicks_daily')
@@ -0,0 +1,35 @@
+"""link health check results
+
+Revision ID: b2e8f4c61d07
+Revises: a7d3e1b94c62
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2e8f4c61d07'
+down_revision = 'a7d3e1b94c62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('link_health',
+    sa.Column('link_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('ok', sa.Boolean(), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('error', sa.String(length=200), nullable=True),
+    sa.Column('latency_ms', sa.Integer(), nullable=True),
+    sa.Column('consecutive_failures', sa.Integer(), nullable=False),
+    sa.Column('checked_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('link_id')
+    )
+
+
+def downgrade():
+    op.drop_table('link_health')
@@ -0,0 +1,34 @@
+"""index users by (created_at, id) for keyset pagination
+
+Revision ID: c52d9e7a1f48
+Revises: 8a4e6c0f2d31
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d9e7a1f48'
+down_revision = '8a4e6c0f2d31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows without created_at would silently drop out of the cursor walk
+    op.execute("UPDATE users SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=False)
+
+    # Build the index without blocking writes to a large users table
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_users_created_at_id', table_name='users')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.alter_column('created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,57 @@
+"""indexes for links by user/position, links by platform and unique lower(email)
+
+Revision ID: e4a7b2c9d053
+Revises: c52d9e7a1f48
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a7b2c9d053'
+down_revision = 'c52d9e7a1f48'
+branch_labels = None
+depends_on = None
+
+# Conflicting emails listed when the upgrade refuses to run
+MAX_LISTED = 50
+
+
+def upgrade():
+    # Emails are compared lowercased from now on. Accounts whose emails only
+    # differ by case have to be merged or renamed by an admin first - the
+    # upgrade stops and lists them rather than pick which one keeps the address
+    conflicts = op.get_bind().execute(sa.text("""
+        SELECT lower(email) AS email, id FROM users
+        WHERE lower(email) IN (SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1)
+        ORDER BY lower(email), created_at, id
+    """)).all()
+    if conflicts:
+        groups = {}
+        for email, user_id in conflicts:
+            groups.setdefault(email, []).append(str(user_id))
+        listed = '\n'.join(f"  {email}: {', '.join(ids)}" for email, ids in list(groups.items())[:MAX_LISTED])
+        more = f"\n  ... and {len(groups) - MAX_LISTED} more" if len(groups) > MAX_LISTED else ''
+        raise RuntimeError(
+            f"{len(groups)} emails belong to several accounts when compared case-insensitively. "
+            f"Merge or rename these accounts (user ids, oldest first), then run the upgrade again:\n{listed}{more}"
+        )
+    op.execute("UPDATE users SET email = lower(email) WHERE email <> lower(email)")
+
+    # Build the indexes without blocking writes to large tables
+    with op.get_context().autocommit_block():
+        op.create_index('ix_user_links_user_id_position', 'user_links', ['user_id', 'position'],
+                        unique=False, postgresql_concurrently=True,
+                        postgresql_include=['id', 'platform_id', 'url', 'created_at'])
+        op.create_index('ix_user_links_platform_id', 'user_links', ['platform_id'],
+                        unique=False, postgresql_concurrently=True)
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')],
+                        unique=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.drop_index('ix_user_links_platform_id', table_name='user_links')
+    op.drop_index('ix_user_links_user_id_position', table_name='user_links')
@@ -0,0 +1,327 @@
+import sys
+import os
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import math
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import SyncToAsync
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from werkzeug.http import parse_cookie
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+from src.main import create_app
+from src.models.models import User, UserLink
+from src.models.serializers import USER_SCHEMA, dumps_json
+from src.middleware.auth import parse_authorization, verify_principal, token_revoked, token_cache
+from src.middleware.compression import compressor
+from src.middleware.metrics import request_metrics
+from src.middleware.rate_limit import rate_limiter
+from src.database.platform_cache import platform_catalog
+from src.database.replicas import replica_router, STICKY_COOKIE
+from src.database.profile_cache import public_profile_cache, render_public_profile, profile_stamp
+from src.routers.users import PUBLIC_PROFILE_MAX_AGE
+
+# Threads running the Flask app for routes that aren't served natively
+WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '16'))
+
+# Sync driver -> async driver for the same database
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url):
+    """postgresql://... -> postgresql+asyncpg://... (psycopg2 URLs included)"""
+    scheme, rest = url.split('://', 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+def async_engine_options(url):
+    """Pool settings for the async engine, from the same DB_POOL_* variables"""
+    if url.startswith('sqlite'):
+        return {}
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes', 'on'),
+    }
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/').strip('"') == etag for tag in tags)
+
+
+def _json(data, status=200, headers=None):
+    body = dumps_json(data)
+    return status, dict(headers or {}, **{'content-type': 'application/json'}), body
+
+
+def _compressed(request_headers, status, headers, body, etag=None):
+    """Apply the same gzip/br negotiation (and cache) as the Flask app"""
+    body, encoding = compressor.encode(body, request_headers.get('accept-encoding'), cache_key=etag)
+    headers = dict(headers, vary='Accept-Encoding')
+    if encoding is not None:
+        headers['content-encoding'] = encoding
+        if etag:
+            headers['etag'] = f'W/"{etag}"'
+    return status, headers, body
+
+
+class ThreadPoolWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi running the WSGI app in a pool of `threads` threads
+
+    asgiref's adapter runs it with thread_sensitive=True, i.e. one request
+    at a time on one shared thread - a bcrypt login would hold up every
+    other WSGI route in the process.
+    """
+
+    def __init__(self, wsgi_application, threads=WSGI_THREADS):
+        super().__init__(wsgi_application)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='asgi-wsgi')
+
+    async def __call__(self, scope, receive, send):
+        instance = WsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)
+        sync_run = WsgiToAsgiInstance.__dict__['run_wsgi_app'].func  # the method under @sync_to_async
+        instance.run_wsgi_app = SyncToAsync(
+            lambda body: sync_run(instance, body), thread_sensitive=False, executor=self.executor
+        )
+        await instance(scope, receive, send)
+
+
+class AsyncApp:
+    """ASGI application for the link-sharing API
+
+    Hot read endpoints (own profile, public profile, platform list) are served
+    natively on the event loop with an async SQLAlchemy session, so one process
+    can keep thousands of those requests in flight. Every other route of the
+    auth, users, platforms and admin blueprints is passed to the regular Flask
+    app through a WSGI adapter, on a pool of ASGI_WSGI_THREADS threads, so
+    both modes share models, validation and caches. SQLite needs aiosqlite.
+
+    Native routes keep what the Flask app does around its views: the rate
+    limits and body limit of the Flask view they stand in for, its request
+    metrics, and replica routing with read-your-writes stickiness (async
+    engines for the same replicas, picked by the same health checks). Work
+    that may block - catalog reloads, replica probes - runs in a thread.
+    """
+
+    def __init__(self, flask_app=None):
+        self.flask_app = flask_app or create_app()
+        self.wsgi = ThreadPoolWsgiToAsgi(self.flask_app)
+
+        url = self.flask_app.config['SQLALCHEMY_DATABASE_URI']
+        self.engine = create_async_engine(async_database_url(url), **async_engine_options(url))
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.replica_engines = {}
+        for replica in replica_router.replicas:
+            replica_url = replica.engine.url.render_as_string(hide_password=False)
+            self.replica_engines[replica.name] = create_async_engine(
+                async_database_url(replica_url), **async_engine_options(replica_url)
+            )
+        self._probe = None
+
+        # (path, handler, endpoint of the Flask view it serves natively)
+        self.routes = [
+            (re.compile(r'^/api/auth/profile/?$'), self.get_profile, 'auth.get_profile'),
+            (re.compile(r'^/api/users/(?P<user_id>[^/]+)/public/?$'), self.get_public_profile, 'users.getPublicProfile'),
+            (re.compile(r'^/api/platforms/$'), self.get_platforms, 'platforms.getAllPlatforms'),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, handler, endpoint in self.routes:
+                match = pattern.match(scope['path'])
+                if match:
+                    return await self.respond(send, await self.dispatch(handler, endpoint, scope, match))
+
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.ensure_catalog()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                for engine in self.replica_engines.values():
+                    await engine.dispose()
+                self.wsgi.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, handler, endpoint, scope, match):
+        started = time.perf_counter()
+        try:
+            headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+            response = self.check_limits(endpoint, scope, headers) or await handler(headers, **match.groupdict())
+        except Exception as e:
+            print(f"ASGI handler error: {e}")
+            response = _json({'error': 'Internal server error'}, 500)
+
+        # Same series as the Flask view (no per-statement numbers here)
+        metrics = request_metrics.endpoint('GET', endpoint)
+        metrics.latency.observe(time.perf_counter() - started)
+        metrics.response_size.observe(len(response[2]))
+        request_metrics.count_response('GET', endpoint, response[0])
+        return response
+
+    def check_limits(self, endpoint, scope, headers):
+        """413/429 response if the Flask view's body or rate limits refuse the request, else None"""
+        view = self.flask_app.view_functions.get(endpoint)
+        max_bytes = getattr(view, 'max_body_bytes', None) or self.flask_app.config.get('MAX_CONTENT_LENGTH')
+        content_length = headers.get('content-length', '')
+        if max_bytes is not None and content_length.isdigit() and int(content_length) > max_bytes:
+            return _json({'error': f'Request body is larger than {max_bytes} bytes'}, 413)
+
+        limits = getattr(view, 'rate_limits', ())
+        if not limits or not rate_limiter.enabled:
+            return None
+        # The limits' key functions read flask.request
+        client = scope.get('client') or ('unknown', 0)
+        with self.flask_app.test_request_context(
+            scope['path'], headers=headers, environ_base={'REMOTE_ADDR': client[0]}
+        ):
+            retry_after = rate_limiter.check(limits)
+        if not retry_after:
+            return None
+        return _json({'error': 'Too many requests, try again later'}, 429,
+                     {'retry-after': str(max(1, math.ceil(retry_after)))})
+
+    async def respond(self, send, response):
+        status, headers, body = response
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(k.encode('latin-1'), str(v).encode('latin-1')) for k, v in headers.items()]
+                       + [(b'content-length', str(len(body)).encode('latin-1'))],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _refresh_catalog(self):
+        with self.flask_app.app_context():
+            platform_catalog.refresh()
+
+    async def ensure_catalog(self):
+        """Reload the platform catalog off the event loop when it is stale"""
+        if not platform_catalog.is_fresh():
+            await asyncio.to_thread(self._refresh_catalog)
+
+    def read_engine(self, headers, user_id=None):
+        """Async engine for this request's reads: a healthy replica unless the
+        client (sticky cookie) or `user_id` wrote recently, else the primary"""
+        if not self.replica_engines:
+            return self.engine
+        if replica_router.probe_due() and (self._probe is None or self._probe.done()):
+            self._probe = asyncio.ensure_future(asyncio.to_thread(replica_router.probe))
+        sticky = replica_router.sticky_cookie_valid(parse_cookie(headers.get('cookie', '')).get(STICKY_COOKIE))
+        replica = replica_router.replica_for_read(sticky=sticky, user_id=user_id)
+        return self.engine if replica is None else self.replica_engines[replica.name]
+
+    async def load_user(self, user_id, engine=None):
+        """User with links and their platforms, loaded in two async queries"""
+        async with self.sessions(bind=engine or self.engine) as session:
+            return await session.get(
+                User, user_id,
+                options=[selectinload(User.user_links).joinedload(UserLink.user_link_platform)]
+            )
+
+    def _serialize(self, fn, *args):
+        # The catalog may need to reload an unknown platform id, which uses the
+        # Flask-SQLAlchemy session and therefore an app context
+        with self.flask_app.app_context():
+            return fn(*args)
+
+    async def serialize(self, user, fn, *args):
+        """fn(*args) for `user`'s profile - in a thread if the catalog would have to reload"""
+        if platform_catalog.needs_reload([link.platform_id for link in user.user_links]):
+            return await asyncio.to_thread(self._serialize, fn, *args)
+        return self._serialize(fn, *args)
+
+    async def get_profile(self, headers):
+        token, error = parse_authorization(headers.get('authorization'))
+        if not error:
+            # The user row loaded below is what the token is checked against
+            principal, error = verify_principal(token, check_user=False)
+        if error:
+            return _json({'error': error[0]}, error[1])
+
+        user = await self.load_user(principal.id, self.read_engine(headers, principal.id))
+        if not user:
+            token_cache.invalidate_user(principal.id)
+            return _json({'error': 'User not found'}, 401)
+        if token_revoked(principal, user.token_version):
+            token_cache.invalidate_user(principal.id)
+            return _json({'error': 'Token is invalid or expired'}, 401)
+
+        await self.ensure_catalog()
+        return _json({'user': await self.serialize(user, USER_SCHEMA.dump, user)})
+
+    async def get_public_profile(self, headers, user_id):
+        try:
+            user_uuid = uuid.UUID(user_id)
+        except ValueError:
+            return _json({'error': 'User not found'}, 404)
+
+        await self.ensure_catalog()
+        # Served without a query while fresh (PUBLIC_PROFILE_CACHE_FRESH)
+        cached = public_profile_cache.get(user_uuid)
+        if cached is None:
+            # Cheap version check: an older render is only used if it is current
+            engine = self.read_engine(headers, user_uuid)
+            async with self.sessions(bind=engine) as session:
+                row = (await session.execute(select(User.updated_at).where(User.id == user_uuid))).first()
+            if row is None:
+                return _json({'error': 'User not found'}, 404)
+
+            cached = public_profile_cache.get(user_uuid, profile_stamp(row.updated_at))
+            if cached is None:
+                user = await self.load_user(user_uuid, engine)
+                if not user:
+                    return _json({'error': 'User not found'}, 404)
+
+                body = await self.serialize(user, render_public_profile, user)
+                etag = public_profile_cache.put(user_uuid, profile_stamp(user.updated_at), body)
+                cached = body, etag
+        body, etag = cached
+
+        response_headers = {
+            'etag': f'"{etag}"',
+            'cache-control': f'public, max-age={PUBLIC_PROFILE_MAX_AGE}',
+        }
+        if _etag_matches(headers.get('if-none-match'), etag):
+            return 304, response_headers, b''
+        return _compressed(headers, 200, dict(response_headers, **{'content-type': 'application/json'}), body, etag)
+
+    async def get_platforms(self, headers):
+        await self.ensure_catalog()
+        etag = platform_catalog.etag
+        if _etag_matches(headers.get('if-none-match'), etag):
+            return 304, {'etag': f'"{etag}"'}, b''
+        return _compressed(headers, *_json({'platforms': platform_catalog.all()}, headers={'etag': f'"{etag}"'}), etag)
+
+
+def create_asgi_app():
+    """Factory for ASGI servers: uvicorn --factory src.asgi:create_asgi_app"""
+    return AsyncApp()
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run(create_asgi_app(), port=5001)
@@ -0,0 +1,243 @@
+from concurrent.futures import ProcessPoolExecutor
+import csv
+import json
+import multiprocessing
+import os
+import uuid
+from datetime import datetime, timezone
+import bcrypt
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.models import db, User, UserLink
+from src.models.password_hasher import password_hasher
+from src.database.platform_cache import platform_catalog
+from src.database.email_filter import email_filter
+from src.models.schemas import Signup, UpdateProfile
+
+DEFAULT_BATCH_SIZE = int(os.getenv('BULK_IMPORT_BATCH_SIZE', '1000'))
+DEFAULT_PROCESSES = int(os.getenv('BULK_IMPORT_PROCESSES', str(os.cpu_count() or 2)))
+MAX_REPORTED_ERRORS = 100
+# Request body cap for POST /api/admin/users/import (bodies are streamed, not held)
+MAX_IMPORT_BYTES = int(os.getenv('BULK_IMPORT_MAX_BYTES', str(1024 ** 3)))
+# Uploaded import files wait here for the import_users job; job workers must see it too
+IMPORT_DIR = os.getenv(
+    'BULK_IMPORT_DIR', os.path.join(os.getenv('MEDIA_ROOT', os.path.join(os.getcwd(), 'media')), 'imports')
+)
+
+
+def _hash_password(args):
+    """bcrypt one password - runs in a worker process"""
+    password, rounds = args
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=rounds)).decode('utf-8')
+
+
+def read_rows(stream, fmt):
+    """Yield (line_number, dict) from a text NDJSON or CSV stream, one row at a time"""
+    if fmt == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            # Links travel as a JSON array in a single CSV column
+            if row.get('links'):
+                try:
+                    row['links'] = json.loads(row['links'])
+                except ValueError:
+                    pass
+            yield line_number, {k: v for k, v in row.items() if v not in (None, '')}
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            yield line_number, None
+
+
+def _validate(row):
+    """Return (user_values, password, links) or raise ValueError with a short message"""
+    if not isinstance(row, dict):
+        raise ValueError("Row is not a JSON object")
+
+    try:
+        credentials = Signup(email=row.get('email'), password=row.get('password'))
+        profile = UpdateProfile(**{k: row[k] for k in ('firstName', 'lastName', 'image', 'links') if k in row})
+    except ValidationError as e:
+        raise ValueError("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+
+    links = []
+    for position, link in enumerate(profile.links or []):
+        if platform_catalog.get(link.platform_id) is None:
+            raise ValueError(f"links.{position}: unknown platform {link.platform_id}")
+        links.append({'platform_id': link.platform_id, 'url': link.url, 'position': position})
+
+    now = datetime.now(timezone.utc)
+    user = {
+        'id': uuid.uuid4(),
+        'email': credentials.email,
+        'firstName': profile.firstName,
+        'lastName': profile.lastName,
+        'image': profile.image,
+        'is_admin': False,
+        'created_at': now,
+        'updated_at': now
+    }
+    return user, credentials.password, links
+
+
+def _insert_ignoring_existing(users):
+    """Multi-row INSERT ... ON CONFLICT (email) DO NOTHING, returns inserted ids"""
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = insert(User.__table__).on_conflict_do_nothing(index_elements=['email']).returning(User.__table__.c.id)
+    return {row[0] for row in db.session.execute(stmt, users)}
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.existing = 0
+        self.invalid = 0
+        self.links = 0
+        self.errors = []
+
+    def error(self, line_number, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line_number, 'error': message})
+
+    def to_dict(self):
+        return {
+            'imported': self.imported,
+            'existing': self.existing,
+            'invalid': self.invalid,
+            'links': self.links,
+            'errors': self.errors
+        }
+
+
+def import_users(rows, batch_size=DEFAULT_BATCH_SIZE, processes=DEFAULT_PROCESSES, result=None):
+    """Import (line_number, dict) rows in batches, committing once per batch
+
+    Passwords of a batch are hashed in parallel across `processes` (in the
+    calling thread when it is 1; spawned, not forked, as the caller may be a
+    threaded job worker), then users and links are written with one
+    multi-row INSERT each. Users whose email
+    already exists are skipped; new emails go into this process's email
+    filter. Returns an ImportResult; pass `result` to
+    keep the counts of the batches committed before an exception.
+    """
+    result = result if result is not None else ImportResult()
+    executor = ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context('spawn')
+    ) if processes > 1 else None
+
+    def flush(batch):
+        if not batch:
+            return
+        passwords = [(password, password_hasher.rounds) for _, password, _ in batch]
+        if executor:
+            hashes = list(executor.map(_hash_password, passwords, chunksize=max(1, len(passwords) // (processes * 4))))
+        else:
+            hashes = [_hash_password(args) for args in passwords]
+
+        # Stamped after hashing, just before the commit: the email filters of
+        # other processes pick up new users by created_at
+        now = datetime.now(timezone.utc)
+        users = []
+        for (user, _, _), hashed in zip(batch, hashes):
+            user['password'] = hashed
+            user['created_at'] = user['updated_at'] = now
+            users.append(user)
+
+        try:
+            inserted = _insert_ignoring_existing(users)
+            links = [
+                dict(link, id=uuid.uuid4(), user_id=user['id'], created_at=user['created_at'])
+                for user, _, user_links in batch if user['id'] in inserted
+                for link in user_links
+            ]
+            if links:
+                db.session.execute(db.insert(UserLink.__table__), links)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for user in users:
+            if user['id'] in inserted:
+                email_filter.add(user['email'])
+        result.imported += len(inserted)
+        result.existing += len(batch) - len(inserted)
+        result.links += len(links)
+
+    try:
+        batch = []
+        seen_emails = set()
+        for line_number, row in rows:
+            try:
+                user, password, links = _validate(row)
+            except ValueError as e:
+                result.error(line_number, str(e)[:200])
+                continue
+
+            # Duplicates inside one batch would abort the multi-row insert
+            if user['email'] in seen_emails:
+                result.existing += 1
+                continue
+            seen_emails.add(user['email'])
+
+            batch.append((user, password, links))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+                seen_emails.clear()
+        flush(batch)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return result
+
+
+def export_users(batch_size=DEFAULT_BATCH_SIZE):
+    """Yield one dict per user (with links), walking users in keyset batches
+
+    Only one batch of users and their links is in memory at a time.
+    """
+    columns = (User.id, User.email, User.firstName, User.lastName, User.image, User.created_at)
+    last = None
+    while True:
+        query = db.select(*columns).order_by(User.created_at, User.id).limit(batch_size)
+        if last is not None:
+            query = query.where(db.tuple_(User.created_at, User.id) > last)
+        users = db.session.execute(query).all()
+        if not users:
+            return
+
+        links = {}
+        for link in db.session.execute(
+            db.select(UserLink.user_id, UserLink.platform_id, UserLink.url)
+            .where(UserLink.user_id.in_([user.id for user in users]))
+            .order_by(UserLink.user_id, UserLink.position)
+        ):
+            links.setdefault(link.user_id, []).append({'platform_id': str(link.platform_id), 'url': link.url})
+
+        for user in users:
+            yield {
+                'id': str(user.id),
+                'email': user.email,
+                'firstName': user.firstName,
+                'lastName': user.lastName,
+                'image': user.image,
+                'created_at': user.created_at.isoformat(),
+                'links': links.get(user.id, [])
+            }
+
+        last = (users[-1].created_at, users[-1].id)
+
+
+def export_ndjson(batch_size=DEFAULT_BATCH_SIZE):
+    """Yield NDJSON lines for export_users()"""
+    for user in export_users(batch_size):
+        yield json.dumps(user, separators=(',', ':')) + '\n'
@@ -0,0 +1,103 @@
+import json
+import multiprocessing
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from src.models.models import db
+from src.database.jobs import job_queue
+
+# Every app process registers these commands and almost none run them, so the
+# heavy modules behind them (bulk, link_checker -> aiohttp) are imported by the
+# command itself. Options left unset fall back to those modules' env defaults.
+
+
+def _given(**options):
+    return {name: value for name, value in options.items() if value is not None}
+
+users_cli = AppGroup('users', help='Bulk user import/export.')
+
+
+@users_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson', show_default=True)
+@click.option('--batch-size', type=int, help='Rows per INSERT/commit [default: BULK_IMPORT_BATCH_SIZE or 1000]')
+@click.option('--processes', type=int, help='Password hashing processes [default: BULK_IMPORT_PROCESSES or CPUs]')
+def import_command(source, fmt, batch_size, processes):
+    """Import users and links from SOURCE ('-' for stdin)"""
+    from src.database.bulk import read_rows, import_users
+    result = import_users(read_rows(source, fmt), **_given(batch_size=batch_size, processes=processes))
+    click.echo(json.dumps(result.to_dict(), indent=2))
+    if result.invalid:
+        sys.exit(1)
+
+
+@users_cli.command('export')
+@click.argument('destination', type=click.File('w', encoding='utf-8'), default='-')
+@click.option('--batch-size', type=int, help='Users fetched per query [default: BULK_IMPORT_BATCH_SIZE or 1000]')
+def export_command(destination, batch_size):
+    """Export users and links as NDJSON to DESTINATION (default stdout)"""
+    from src.database.bulk import export_ndjson
+    for line in export_ndjson(**_given(batch_size=batch_size)):
+        destination.write(line)
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('work')
+@click.option('--threads', default=4, show_default=True, help='Worker threads per process.')
+@click.option('--processes', default=1, show_default=True, help='Worker processes.')
+def work_command(threads, processes):
+    """Run dedicated job worker processes until interrupted"""
+    app = current_app._get_current_object()
+    # Forked children must not share the parent's pooled connections
+    db.engine.dispose()
+    children = []
+    for _ in range(processes - 1):
+        child = multiprocessing.get_context('fork').Process(target=job_queue.work, args=(app, threads))
+        child.start()
+        children.append(child)
+    click.echo(f"Job workers: {processes} process(es) x {threads} thread(s)")
+    try:
+        job_queue.work(app, threads)
+    finally:
+        for child in children:
+            child.join()
+
+
+@jobs_cli.command('stats')
+def stats_command():
+    """Print queued/running/failed job counts"""
+    depth = job_queue.depth()
+    for (name, status), count in sorted(depth.items()):
+        click.echo(f"{name:<30} {status:<8} {count}")
+    click.echo(f"oldest due job waiting {job_queue.oldest_due_age():.1f}s")
+
+
+@jobs_cli.command('purge')
+@click.option('--older-than', default=86400, show_default=True, help='Seconds since a job finished.')
+def purge_command(older_than):
+    """Delete jobs that finished successfully more than --older-than seconds ago"""
+    click.echo(f"Deleted {job_queue.purge(older_than)} finished job(s)")
+
+
+links_cli = AppGroup('links', help='Link health checks.')
+
+
+@links_cli.command('check')
+@click.option('--concurrency', type=int, help='Requests in flight [default: LINK_CHECK_CONCURRENCY or 100]')
+@click.option('--per-host', type=int, help='Connections per host [default: LINK_CHECK_PER_HOST or 4]')
+@click.option('--timeout', type=float, help='Seconds per request [default: LINK_CHECK_TIMEOUT or 10]')
+@click.option('--batch-size', type=int, help='Rows per fetch/upsert [default: LINK_CHECK_BATCH_SIZE or 1000]')
+@click.option('--max-age', default=86400, show_default=True, help='Recheck links older than this many seconds.')
+@click.option('--allow-private', is_flag=True, help='Also fetch private/loopback addresses.')
+def check_command(concurrency, per_host, timeout, batch_size, max_age, allow_private):
+    """Check link URLs and record status/latency in link_health (run from cron)"""
+    from src.database.link_checker import LinkChecker
+    checker = LinkChecker(allow_private=allow_private, **_given(
+        concurrency=concurrency, per_host=per_host, timeout=timeout, batch_size=batch_size
+    ))
+    summary = checker.run(max_age=max_age)
+    pruned = checker.prune()
+    click.echo(json.dumps(dict(summary.to_dict(), pruned=pruned), indent=2))
@@ -0,0 +1,252 @@
+from collections import Counter, OrderedDict, deque
+from datetime import datetime, timezone
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.models import LinkClickDaily, UserLink, db
+from src.database.pool import Histogram
+from src.database.replicas import replica_router
+import atexit
+import os
+import threading
+import time
+
+FLUSH_LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, float('inf'))
+FLUSH_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf'))
+
+# Rows per multi-row upsert statement
+UPSERT_BATCH = 500
+
+
+class LinkIndex:
+    """Bounded LRU of link id -> (target url, owner id) for the redirect endpoint
+
+    A miss reads the one link row; hits never touch the database. Unknown
+    ids are remembered too, for LINK_INDEX_NEGATIVE_TTL seconds, so a flood
+    of made-up ids costs one primary query per id and not one per request.
+    Profile saves and user deletes call invalidate_user(), the TTL makes
+    other worker processes pick up edits eventually.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, negative_ttl=None):
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv('LINK_INDEX_SIZE', '100000'))
+        self.ttl = ttl if ttl is not None else int(os.getenv('LINK_INDEX_TTL', '60'))
+        self.negative_ttl = negative_ttl if negative_ttl is not None else float(os.getenv('LINK_INDEX_NEGATIVE_TTL', '5'))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # link_id -> (url, user_id, expires_at)
+        self._by_user = {}  # user_id -> {link_id}
+        self._missing = OrderedDict()  # link_id -> expires_at, for ids with no link
+
+    def get(self, link_id):
+        """Return (url, user_id) or None for an unknown link (needs an app context on a miss)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(link_id)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(link_id)
+                return entry[0], entry[1]
+            missing_until = self._missing.get(link_id)
+            if missing_until is not None and missing_until > now:
+                return None
+
+        # From the primary: a link saved a moment ago must not 404 off a lagging replica
+        with replica_router.primary():
+            row = db.session.execute(
+                db.select(UserLink.url, UserLink.user_id).where(UserLink.id == link_id)
+            ).first()
+        if row is None:
+            if self.negative_ttl > 0:
+                with self._lock:
+                    self._missing[link_id] = time.monotonic() + self.negative_ttl
+                    self._missing.move_to_end(link_id)
+                    while len(self._missing) > self.maxsize:
+                        self._missing.popitem(last=False)
+            return None
+
+        with self._lock:
+            self._missing.pop(link_id, None)
+            self._entries[link_id] = (row.url, row.user_id, time.monotonic() + self.ttl)
+            self._entries.move_to_end(link_id)
+            self._by_user.setdefault(row.user_id, set()).add(link_id)
+            while len(self._entries) > self.maxsize:
+                evicted, (_, user_id, _) = self._entries.popitem(last=False)
+                self._forget(user_id, evicted)
+        return row.url, row.user_id
+
+    def _forget(self, user_id, link_id):
+        links = self._by_user.get(user_id)
+        if links is not None:
+            links.discard(link_id)
+            if not links:
+                del self._by_user[user_id]
+
+    def invalidate_user(self, user_id):
+        """Drop every cached link of a user, e.g. after their links changed"""
+        with self._lock:
+            for link_id in self._by_user.pop(user_id, ()):
+                self._entries.pop(link_id, None)
+            # The user's new links may be among the ids remembered as missing
+            self._missing.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+            self._missing.clear()
+
+
+class ClickTracker:
+    """Write-behind click counting
+
+    record() appends (link id, owner id, time) to a bounded in-memory ring
+    buffer and returns - a redirect never waits on the database. A flusher
+    thread drains the buffer every CLICK_FLUSH_INTERVAL seconds, or as soon as
+    CLICK_FLUSH_EVENTS clicks are waiting, aggregates it to one count per link
+    and day and adds those to link_clicks_daily with multi-row upserts.
+
+    When the buffer is full the oldest clicks are dropped (and counted); a
+    failed flush keeps its aggregated counts for the next attempt. Counts of
+    clicks still buffered when a process is killed are lost - these are
+    analytics, not billing.
+    """
+
+    def __init__(self, buffer_size=None, flush_interval=None, flush_events=None):
+        self.buffer_size = buffer_size if buffer_size is not None else int(os.getenv('CLICK_BUFFER_SIZE', '100000'))
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv('CLICK_FLUSH_INTERVAL', '5'))
+        self.flush_events = flush_events if flush_events is not None else int(os.getenv('CLICK_FLUSH_EVENTS', '1000'))
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._events = deque(maxlen=self.buffer_size)
+        self._pending = Counter()  # (link_id, user_id, day) -> clicks of a failed flush
+        self._pending_since = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._pid = None
+
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed = 0
+        self.flush_errors = 0
+        self.flush_lag = Histogram(FLUSH_LAG_BUCKETS)
+        self.flush_duration = Histogram(FLUSH_BUCKETS)
+
+    def record(self, link_id, user_id):
+        with self._lock:
+            if len(self._events) == self.buffer_size:
+                self.dropped += 1  # the append below pushes out the oldest click
+            self._events.append((link_id, user_id, time.time()))
+            self.recorded += 1
+            full = len(self._events) >= self.flush_events
+        if full:
+            self._wakeup.set()
+
+    @property
+    def buffered(self):
+        return len(self._events)
+
+    def flush(self):
+        """Write every buffered click to the database, return how many (needs an app context)"""
+        with self._flush_lock:
+            with self._lock:
+                events, self._events = self._events, deque(maxlen=self.buffer_size)
+            if not events and not self._pending:
+                return 0
+
+            counts = self._pending
+            oldest = self._pending_since or (events[0][2] if events else time.time())
+            for link_id, user_id, clicked_at in events:
+                day = datetime.fromtimestamp(clicked_at, timezone.utc).date()
+                counts[(link_id, user_id, day)] += 1
+            self._pending, self._pending_since = Counter(), None
+
+            start = time.perf_counter()
+            try:
+                self._upsert(counts)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                print(f"Click flush error: {e}")
+                with self._lock:
+                    self.flush_errors += 1
+                    if len(counts) <= self.buffer_size:
+                        self._pending, self._pending_since = counts, oldest
+                    else:
+                        self.dropped += sum(counts.values())
+                return 0
+
+            clicks = sum(counts.values())
+            with self._lock:
+                self.flushed += clicks
+            self.flush_duration.observe(time.perf_counter() - start)
+            self.flush_lag.observe(time.time() - oldest)
+            return clicks
+
+    def _upsert(self, counts):
+        """INSERT ... ON CONFLICT (link_id, day) DO UPDATE SET clicks = clicks + excluded.clicks"""
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        table = LinkClickDaily.__table__
+        rows = [
+            {'link_id': link_id, 'user_id': user_id, 'day': day, 'clicks': clicks}
+            for (link_id, user_id, day), clicks in counts.items()
+        ]
+        for i in range(0, len(rows), UPSERT_BATCH):
+            stmt = insert(table).values(rows[i:i + UPSERT_BATCH])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['link_id', 'day'],
+                set_={'clicks': table.c.clicks + stmt.excluded.clicks}
+            )
+            db.session.execute(stmt)
+
+    # Flusher thread
+
+    def start(self, app):
+        """Start the flusher thread in this process (once per process, fork safe)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, args=(app,), name='click-flusher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        """Stop the flusher after a last flush"""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        with self._lock:
+            self._thread = None
+            self._pid = None
+
+    @property
+    def started(self):
+        return self._pid == os.getpid()
+
+    def _run(self, app):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                with app.app_context():
+                    self.flush()
+            except Exception as e:
+                print(f"Click flusher error: {e}")
+            if self._stopping.is_set():
+                return
+
+
+link_index = LinkIndex()
+click_tracker = ClickTracker()
+
+# Flush what's still buffered on a clean shutdown
+atexit.register(click_tracker.stop)
+
+
+def init_clicks(app):
+    """Start the click flusher on the first request, i.e. after a pre-fork server forked"""
+    def start_flusher():
+        if not click_tracker.started:
+            click_tracker.start(app)
+
+    app.before_request(start_flusher)
@@ -1,10 +1,20 @@
 from src.models.models import db
 
-def init_db(app):
-    """Initialize the database with the Flask app"""
+def init_db(app, create_schema=True):
+    """Initialize the database with the Flask app
+
+    create_schema=False skips db.create_all() - production runs migrations
+    once before forking workers instead of inspecting the schema per worker.
+    """
     db.init_app(app)
+    if create_schema:
+        create_tables(app)
+
+def create_tables(app):
+    """db.create_all() on the primary - inspects the schema, one round trip per table"""
     with app.app_context():
-        db.create_all()
+        # Primary only - replica binds receive the schema through replication
+        db.create_all(bind_key=None)
 
 def get_db():
     """Get the database instance - much simpler now!"""
@@ -0,0 +1,225 @@
+from datetime import timedelta
+from hashlib import blake2b
+from src.models.models import User, db
+from src.startup import env_flag
+import math
+import os
+import threading
+import time
+
+# Rows per fetch of the streaming rebuild scan
+SCAN_BATCH = 10000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings
+
+    `might_contain` never returns False for an added value; it returns True
+    for a value never added with probability about `error_rate` while at most
+    `capacity` values are in. Bit positions come from one blake2b digest
+    (double hashing), so a lookup is a single hash call.
+    """
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        digest = blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, value):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class EmailFilter:
+    """In-memory Bloom filter of registered emails for the availability check
+
+    A background thread loads it with a streaming scan of users.email once
+    the first request arrives and reloads it every EMAIL_FILTER_REFRESH
+    seconds (which drops deleted accounts). In between, every
+    EMAIL_FILTER_SYNC seconds, it adds the users created since the newest
+    one it has seen (less EMAIL_FILTER_SYNC_OVERLAP seconds, for clock skew
+    between app servers and rows committed out of order), so signups and
+    imports in other processes reach this one within a few seconds. Signups
+    and imports in this process add their emails right away.
+
+    "Definitely not registered" answers need no query - everything else (a
+    hit, a false positive, a filter still loading or whose sync fell behind)
+    is confirmed against the database by the caller, and the unique index on
+    users.email stays the real guard. An email registered elsewhere within
+    the last sync interval can still be answered "not registered".
+    EMAIL_FILTER_ENABLED=false sends every check to the database.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, refresh_interval=None, sync_interval=None,
+                 sync_overlap=None, enabled=None):
+        self.enabled = enabled if enabled is not None else env_flag('EMAIL_FILTER_ENABLED', 'true')
+        self.capacity = capacity if capacity is not None else int(os.getenv('EMAIL_FILTER_CAPACITY', '1000000'))
+        self.error_rate = error_rate if error_rate is not None else float(os.getenv('EMAIL_FILTER_ERROR_RATE', '0.01'))
+        self.refresh_interval = refresh_interval if refresh_interval is not None else float(os.getenv('EMAIL_FILTER_REFRESH', '300'))
+        self.sync_interval = sync_interval if sync_interval is not None else float(os.getenv('EMAIL_FILTER_SYNC', '2'))
+        self.sync_overlap = timedelta(
+            seconds=sync_overlap if sync_overlap is not None else float(os.getenv('EMAIL_FILTER_SYNC_OVERLAP', '30'))
+        )
+        self._lock = threading.Lock()
+        self._filter = None  # None until the first load finishes
+        self._added_during_rebuild = None
+        self._watermark = None  # newest users.created_at in the filter
+        self._thread = None
+        self._pid = None
+        self.last_rebuild = None  # time.monotonic() when the scan of the current filter began
+        self.last_sync = None  # ... and when the last scan or sync that succeeded began
+
+        self.negatives = 0  # answered without a query
+        self.positives = 0  # passed on to the database
+        self.rebuilds = 0
+        self.rebuild_seconds = 0.0
+        self.synced = 0  # emails added by syncs
+
+    @property
+    def ready(self):
+        return self._filter is not None
+
+    @property
+    def stale(self):
+        """Whether syncing fell behind, so other processes' signups may be missing"""
+        if self.last_sync is None:
+            return True
+        return time.monotonic() - self.last_sync > self.sync_interval * 3
+
+    def add(self, email):
+        """Record a newly registered email"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(email)
+            if self._added_during_rebuild is not None:
+                self._added_during_rebuild.append(email)
+
+    def might_contain(self, email):
+        """False only when the email is not registered (as of the last sync)"""
+        bloom = self._filter
+        found = bloom is None or self.stale or bloom.might_contain(email)
+        with self._lock:
+            if found:
+                self.positives += 1
+            else:
+                self.negatives += 1
+        return found
+
+    def rebuild(self):
+        """Load every registered email into a fresh filter and swap it in (needs an app context)"""
+        start = time.perf_counter()
+        scan_started = time.monotonic()
+        watermark = None
+        with self._lock:
+            self._added_during_rebuild = []
+        try:
+            # A connection of its own, reading the primary: the scan must not
+            # miss accounts a lagging replica doesn't have yet
+            with db.engine.connect() as conn:
+                registered = conn.execute(db.select(db.func.count()).select_from(User)).scalar()
+                bloom = BloomFilter(max(self.capacity, registered * 2), self.error_rate)
+                rows = conn.execution_options(stream_results=True, max_row_buffer=SCAN_BATCH).execute(
+                    db.select(User.email, User.created_at)
+                )
+                for partition in rows.partitions(SCAN_BATCH):
+                    for email, created_at in partition:
+                        bloom.add(email)
+                        if watermark is None or created_at > watermark:
+                            watermark = created_at
+            with self._lock:
+                # Signups committed while the scan ran may not be in it
+                for email in self._added_during_rebuild:
+                    bloom.add(email)
+                self._filter = bloom
+                self._watermark = watermark
+                self.last_rebuild = self.last_sync = scan_started
+        finally:
+            with self._lock:
+                self._added_during_rebuild = None
+        self.rebuilds += 1
+        self.rebuild_seconds = time.perf_counter() - start
+        return bloom.count
+
+    def sync(self):
+        """Add users created since the newest one in the filter, return how many were new (needs an app context)"""
+        bloom = self._filter
+        if bloom is None:
+            return 0
+        sync_started = time.monotonic()
+        query = db.select(User.email, User.created_at)
+        if self._watermark is not None:
+            query = query.where(User.created_at > self._watermark - self.sync_overlap)
+        with db.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        added = 0
+        with self._lock:
+            if self._filter is not bloom:
+                return 0  # a rebuild swapped in a newer filter meanwhile
+            for email, created_at in rows:
+                # The overlap brings back rows already in the filter
+                if not bloom.might_contain(email):
+                    bloom.add(email)
+                    added += 1
+                if self._watermark is None or created_at > self._watermark:
+                    self._watermark = created_at
+            self.last_sync = sync_started
+            self.synced += added
+        return added
+
+    def clear(self):
+        with self._lock:
+            self._filter = None
+            self._watermark = None
+            self.last_rebuild = self.last_sync = None
+
+    # Loader thread
+
+    def start(self, app):
+        """Start the load/sync thread in this process (once per process, fork safe)"""
+        with self._lock:
+            if self._pid == os.getpid() or not self.enabled:
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, args=(app,), name='email-filter', daemon=True)
+            self._thread.start()
+
+    @property
+    def started(self):
+        return self._pid == os.getpid()
+
+    def _run(self, app):
+        while True:
+            try:
+                with app.app_context():
+                    if self.last_rebuild is None or time.monotonic() - self.last_rebuild >= self.refresh_interval:
+                        self.rebuild()
+                    else:
+                        self.sync()
+            except Exception as e:
+                print(f"Email filter rebuild error: {e}")
+            time.sleep(min(self.sync_interval, self.refresh_interval))
+
+
+email_filter = EmailFilter()
+
+
+def init_email_filter(app):
+    """Load the email filter on the first request, i.e. after a pre-fork server forked"""
+    def start_loader():
+        if email_filter.enabled and not email_filter.started:
+            email_filter.start(app)
+
+    app.before_request(start_loader)
@@ -0,0 +1,239 @@
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+
+CHUNK_SIZE = 64 * 1024
+# Decoded size cap: a small, highly compressed file can expand to gigabytes
+MAX_IMAGE_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', str(40 * 1000 * 1000)))
+KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+IMAGE_URL_PREFIX = '/api/images'
+
+# Leading bytes of the formats we accept -> file extension
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+# name -> (file name, longest side in px, square crop, Pillow format, save options)
+VARIANTS = {
+    'avatar': ('avatar.jpg', 256, True, 'JPEG', {'quality': 85, 'optimize': True}),
+    'thumbnail': ('thumbnail.jpg', 64, True, 'JPEG', {'quality': 80, 'optimize': True}),
+    'webp': ('image.webp', 1024, False, 'WEBP', {'quality': 80, 'method': 4}),
+}
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class UnsupportedImage(Exception):
+    pass
+
+
+def image_url(value, variant='avatar'):
+    """URL of a stored image's variant; anything else (legacy URLs) passes through"""
+    if value and KEY_PATTERN.match(value):
+        return f'{IMAGE_URL_PREFIX}/{value}/{variant}'
+    return value
+
+
+def sniff(head):
+    """File extension for the image's magic bytes, or None"""
+    for signature, extension in SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def _write_atomic(path, write):
+    """Write through a temp file in the same directory, then rename into place"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def open_image(path, max_pixels=MAX_IMAGE_PIXELS):
+    """Open an image with Pillow, refusing it before decoding if it has over `max_pixels`
+
+    Only the header is read here; raises ImageTooLarge or UnsupportedImage.
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    # Pillow's own guard, for anything that decodes without going through here
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        image = Image.open(path)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+    except (UnidentifiedImageError, OSError) as e:
+        raise UnsupportedImage(f"Unreadable image: {e}")
+    width, height = image.size
+    if width * height > max_pixels:
+        image.close()
+        raise ImageTooLarge(f"Image is {width}x{height}, more than {max_pixels} pixels")
+    return image
+
+
+def generate_variants(original_path, variants_dir, max_pixels=MAX_IMAGE_PIXELS):
+    """Resize one original into every variant (runs in a worker process)"""
+    from PIL import Image, ImageOps
+
+    with open_image(original_path, max_pixels) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+        for filename, size, square, fmt, options in VARIANTS.values():
+            if square:
+                variant = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            else:
+                variant = image.copy()
+                variant.thumbnail((size, size), Image.LANCZOS)
+            if fmt == 'JPEG' and variant.mode != 'RGB':
+                variant = variant.convert('RGB')
+            _write_atomic(os.path.join(variants_dir, filename), lambda f: variant.save(f, fmt, **options))
+
+
+class ImageStore:
+    """Content-addressed image storage on local disk
+
+    Uploads are streamed to a temp file while hashed, so a request never holds
+    the image in memory; the SHA-256 of the bytes is the content key and the
+    same image uploaded twice is stored once. Resized variants are produced
+    in a process pool by a background job after the upload returns - an image
+    is "pending" until all of its variant files exist (status is read from
+    disk, so every worker process agrees on it).
+    """
+
+    def __init__(self, root=None, max_bytes=None, workers=None, max_pixels=None):
+        self.root = root or os.getenv('MEDIA_ROOT', os.path.join(os.getcwd(), 'media'))
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.getenv('IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+        self.max_pixels = max_pixels if max_pixels is not None else MAX_IMAGE_PIXELS
+        self.workers = workers if workers is not None else int(os.getenv('IMAGE_WORKERS', '2'))
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # Layout: originals/ab/<key>, variants/<key>/<file>, failed/<key>
+
+    def original_path(self, key):
+        return os.path.join(self.root, 'originals', key[:2], key)
+
+    def variants_dir(self, key):
+        return os.path.join(self.root, 'variants', key)
+
+    def variant_path(self, key, variant):
+        return os.path.join(self.variants_dir(key), VARIANTS[variant][0])
+
+    def failed_path(self, key):
+        return os.path.join(self.root, 'failed', key)
+
+    def save(self, stream):
+        """Stream an upload to disk, return its content key
+
+        Raises ImageTooLarge past max_bytes or max_pixels (read from the image
+        header, nothing is decoded) and UnsupportedImage when the bytes are
+        not PNG/JPEG/GIF/WebP.
+        """
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        head = b''
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                while True:
+                    chunk = stream.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ImageTooLarge(f"Image is larger than {self.max_bytes} bytes")
+                    if len(head) < 16:
+                        head += chunk[:16 - len(head)]
+                    digest.update(chunk)
+                    f.write(chunk)
+
+            if sniff(head) is None:
+                raise UnsupportedImage("Only PNG, JPEG, GIF and WebP images are supported")
+            open_image(tmp_path, self.max_pixels).close()
+
+            key = digest.hexdigest()
+            path = self.original_path(key)
+            if os.path.exists(path):
+                os.unlink(tmp_path)  # already stored
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return key
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def exists(self, key):
+        return bool(KEY_PATTERN.match(key or '')) and os.path.exists(self.original_path(key))
+
+    def status(self, key):
+        """'ready', 'pending', 'failed' or None for an unknown key"""
+        if not self.exists(key):
+            return None
+        if all(os.path.exists(self.variant_path(key, name)) for name in VARIANTS):
+            return 'ready'
+        if os.path.exists(self.failed_path(key)):
+            return 'failed'
+        return 'pending'
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned, not forked: the caller is a job worker thread, and a fork
+                # would copy the other job threads, heartbeats and pooled connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def generate(self, key, final_attempt=True):
+        """Produce the variants of `key` in the process pool and wait for them
+
+        Called from the `process_image` background job. A failure re-raises
+        so the job is retried; only on the `final_attempt` does it also leave
+        the marker that reports status 'failed'.
+        """
+        if self.status(key) in (None, 'ready'):
+            return
+        future = self._get_executor().submit(
+            generate_variants, self.original_path(key), self.variants_dir(key), self.max_pixels
+        )
+        try:
+            future.result()
+        except Exception as e:
+            if final_attempt:
+                _write_atomic(self.failed_path(key), lambda f: f.write(str(e).encode('utf-8')))
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+image_store = ImageStore()
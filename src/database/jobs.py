@@ -0,0 +1,331 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import event
+from src.models.models import Job, db
+from src.database.pool import Histogram
+from src.database.replicas import RoutingSession
+import logging
+import os
+import random
+import signal
+import threading
+import time
+import traceback
+
+logger = logging.getLogger('src.jobs')
+
+JOB_LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, float('inf'))
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Task:
+    __slots__ = ('name', 'fn', 'max_attempts')
+
+    def __init__(self, name, fn, max_attempts):
+        self.name = name
+        self.fn = fn
+        self.max_attempts = max_attempts
+
+
+class JobMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.wait = {}  # name -> Histogram of run_at -> claimed
+        self.duration = {}  # name -> Histogram of handler run time
+        self.outcomes = {}  # (name, outcome) -> count
+
+    def observe(self, name, wait, duration, outcome):
+        with self._lock:
+            if name not in self.wait:
+                self.wait[name] = Histogram(JOB_LATENCY_BUCKETS)
+                self.duration[name] = Histogram(JOB_LATENCY_BUCKETS)
+            key = (name, outcome)
+            self.outcomes[key] = self.outcomes.get(key, 0) + 1
+        self.wait[name].observe(wait)
+        self.duration[name].observe(duration)
+
+
+class JobQueue:
+    """Durable background jobs stored in the `jobs` table
+
+    `enqueue()` adds the job row to the current session, so it commits (or
+    rolls back) together with the request's own writes - a job can never run
+    for a signup that didn't happen or get lost after one that did. An
+    after-commit hook then wakes this process's worker threads.
+
+    Workers claim due rows with SELECT ... FOR UPDATE SKIP LOCKED, so any
+    number of threads and processes (`flask jobs work`) share the table
+    without handing out a job twice. Failures are retried with exponential
+    backoff and jitter until the task's max_attempts. While a job runs its
+    lock is refreshed every `lock_timeout` / 3 seconds, so only a job whose
+    worker died is reclaimed, once its lock is older than `lock_timeout`.
+    """
+
+    def __init__(self, threads=None, poll_interval=None, lock_timeout=None, backoff_base=None, backoff_max=None):
+        self.threads = threads if threads is not None else int(os.getenv('JOB_WORKER_THREADS', '0'))
+        self.poll_interval = poll_interval if poll_interval is not None else float(os.getenv('JOB_POLL_INTERVAL', '1'))
+        self.lock_timeout = lock_timeout if lock_timeout is not None else float(os.getenv('JOB_LOCK_TIMEOUT', '300'))
+        self.backoff_base = backoff_base if backoff_base is not None else float(os.getenv('JOB_BACKOFF_BASE', '2'))
+        self.backoff_max = backoff_max if backoff_max is not None else float(os.getenv('JOB_BACKOFF_MAX', '600'))
+        self.tasks = {}
+        self.metrics = JobMetrics()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._pid = None
+        self._local = threading.local()  # .job: the job this thread is running
+
+    def task(self, name, max_attempts=5):
+        """Register `fn(**payload)` as the handler for jobs called `name`"""
+        def decorator(fn):
+            self.tasks[name] = Task(name, fn, max_attempts)
+            return fn
+        return decorator
+
+    def enqueue(self, name, delay=0, **payload):
+        """Add a job to the current transaction; it runs after the commit"""
+        task = self.tasks[name]
+        now = _utcnow()
+        job = Job(
+            name=name, payload=payload, status='queued', attempts=0,
+            max_attempts=task.max_attempts, run_at=now + timedelta(seconds=delay), created_at=now
+        )
+        db.session.add(job)
+        db.session.info['jobs_enqueued'] = True
+        return job
+
+    def wake(self):
+        self._wakeup.set()
+
+    # Workers
+
+    @property
+    def started(self):
+        return self._pid == os.getpid()
+
+    def start(self, app, threads=None):
+        """Start worker threads in this process (once per process, fork safe)"""
+        threads = self.threads if threads is None else threads
+        with self._lock:
+            if self._pid == os.getpid() or threads <= 0:
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._workers = [
+                threading.Thread(target=self._work, args=(app,), name=f'job-worker-{i}', daemon=True)
+                for i in range(threads)
+            ]
+            for worker in self._workers:
+                worker.start()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout)
+        with self._lock:
+            self._workers = []
+            self._pid = None
+
+    def work(self, app, threads):
+        """Run `threads` workers in this process until SIGTERM or Ctrl-C, then let running jobs finish"""
+        def interrupt(signum, frame):
+            raise KeyboardInterrupt
+
+        signal.signal(signal.SIGTERM, interrupt)
+        self.start(app, threads=threads)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            self.stop(timeout=30)
+
+    def _work(self, app):
+        while not self._stopping.is_set():
+            try:
+                with app.app_context():
+                    ran = self.run_once()
+            except Exception as e:
+                print(f"Job worker error: {e}")
+                ran = False
+            if not ran:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def claim(self):
+        """Lock the next due job for this worker, or return None"""
+        now = _utcnow()
+        stale = now - timedelta(seconds=self.lock_timeout)
+        candidate = db.session.execute(
+            db.select(Job.id, Job.status, Job.locked_at)
+            .where(db.or_(
+                db.and_(Job.status == 'queued', Job.run_at <= now),
+                db.and_(Job.status == 'running', Job.locked_at < stale),
+            ))
+            .order_by(Job.run_at)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if candidate is None:
+            db.session.rollback()
+            return None
+
+        # Compare-and-set on the state we read: with SKIP LOCKED it always
+        # wins, on databases without row locks (SQLite) only one worker does
+        seen_lock = (Job.locked_at == candidate.locked_at) if candidate.locked_at else Job.locked_at.is_(None)
+        claimed = db.session.execute(
+            db.update(Job)
+            .where(Job.id == candidate.id, Job.status == candidate.status, seen_lock)
+            .values(status='running', locked_at=now, attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+        return db.session.get(Job, candidate.id) if claimed else None
+
+    def current_job(self):
+        """The Job this thread is running, None outside a task"""
+        return getattr(self._local, 'job', None)
+
+    def final_attempt(self):
+        """True unless the job running in this thread will be retried if it fails"""
+        job = self.current_job()
+        return job is None or job.attempts >= job.max_attempts
+
+    def _heartbeat(self, job_id, locked_at):
+        """Keep a running job's lock fresh until the returned event is set"""
+        app = current_app._get_current_object()
+        stop = threading.Event()
+
+        def beat():
+            ours = locked_at
+            while not stop.wait(self.lock_timeout / 3):
+                now = _utcnow()
+                try:
+                    # A connection of its own: the job's session may be mid-transaction
+                    with app.app_context(), db.engine.begin() as conn:
+                        refreshed = conn.execute(
+                            db.update(Job)
+                            .where(Job.id == job_id, Job.status == 'running', Job.locked_at == ours)
+                            .values(locked_at=now)
+                        ).rowcount
+                except Exception as e:
+                    print(f"Job heartbeat error: {e}")
+                    continue
+                if not refreshed:
+                    return  # finished, or reclaimed by another worker
+                ours = now
+
+        threading.Thread(target=beat, name=f'job-heartbeat-{job_id}', daemon=True).start()
+        return stop
+
+    def run_once(self):
+        """Claim and run one job, return False when nothing was due"""
+        job = self.claim()
+        if job is None:
+            return False
+
+        name = job.name
+        wait = max(0.0, (job.locked_at - job.run_at).total_seconds())
+        task = self.tasks.get(name)
+        heartbeat = self._heartbeat(job.id, job.locked_at)
+        self._local.job = job
+        start = time.perf_counter()
+        try:
+            if task is None:
+                raise LookupError(f"No handler registered for job '{name}'")
+            task.fn(**job.payload)
+        except Exception as e:
+            db.session.rollback()
+            duration = time.perf_counter() - start
+            outcome = self._failed(job, e)
+            logger.warning("Job %s (%s) attempt %d failed: %s", name, job.id, job.attempts, e)
+        else:
+            duration = time.perf_counter() - start
+            job.status = 'done'
+            job.finished_at = _utcnow()
+            job.last_error = None
+            outcome = 'succeeded'
+        finally:
+            self._local.job = None
+            heartbeat.set()
+        db.session.commit()
+        self.metrics.observe(name, wait, duration, outcome)
+        return True
+
+    def _failed(self, job, error):
+        job.last_error = ''.join(traceback.format_exception_only(type(error), error)).strip()[:2000]
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+            job.finished_at = _utcnow()
+            return 'failed'
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1))
+        job.status = 'queued'
+        job.locked_at = None
+        job.run_at = _utcnow() + timedelta(seconds=delay * random.uniform(0.5, 1.0))
+        return 'retried'
+
+    # Introspection
+
+    def depth(self):
+        """{(name, status): count} for jobs not yet finished successfully"""
+        rows = db.session.execute(
+            db.select(Job.name, Job.status, db.func.count())
+            .where(Job.status.in_(('queued', 'running', 'failed')))
+            .group_by(Job.name, Job.status)
+        ).all()
+        return {(name, status): count for name, status, count in rows}
+
+    def oldest_due_age(self):
+        """Seconds the oldest due job has been waiting (0 when none)"""
+        oldest = db.session.execute(
+            db.select(db.func.min(Job.run_at))
+            .where(Job.status == 'queued', Job.run_at <= _utcnow())
+        ).scalar()
+        return max(0.0, (_utcnow() - oldest).total_seconds()) if oldest else 0.0
+
+    def purge(self, older_than):
+        """Delete finished (done) jobs older than `older_than` seconds"""
+        cutoff = _utcnow() - timedelta(seconds=older_than)
+        result = db.session.execute(
+            db.delete(Job).where(Job.status == 'done', Job.finished_at < cutoff)
+        )
+        db.session.commit()
+        return result.rowcount
+
+
+job_queue = JobQueue()
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _wake_workers(session):
+    if session.info.pop('jobs_enqueued', False):
+        job_queue.wake()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_enqueued(session):
+    session.info.pop('jobs_enqueued', None)
+
+
+def init_jobs(app):
+    """Run JOB_WORKER_THREADS worker threads in each app process
+
+    The default, 0, leaves jobs to dedicated worker processes: gunicorn.conf.py
+    starts JOB_WORKER_PROCESSES of them next to the web workers, `flask jobs
+    work` runs them anywhere else, and `python src/main.py` runs one thread.
+    Set it (e.g. 1-2) to run jobs in the web processes themselves; threads
+    are started on the first request, i.e. after a pre-fork server has
+    forked its workers.
+    """
+    if job_queue.threads <= 0:
+        return
+
+    def start_workers():
+        if not job_queue.started:
+            job_queue.start(app)
+
+    app.before_request(start_workers)
@@ -0,0 +1,269 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+import asyncio
+import ipaddress
+import os
+import time
+import aiohttp
+from aiohttp.resolver import ThreadedResolver
+from yarl import URL
+from sqlalchemy.dialects import postgresql, sqlite
+from src.models.models import LinkHealth, UserLink, db
+
+DEFAULT_CONCURRENCY = int(os.getenv('LINK_CHECK_CONCURRENCY', '100'))
+DEFAULT_PER_HOST = int(os.getenv('LINK_CHECK_PER_HOST', '4'))
+DEFAULT_TIMEOUT = float(os.getenv('LINK_CHECK_TIMEOUT', '10'))
+DEFAULT_BATCH_SIZE = int(os.getenv('LINK_CHECK_BATCH_SIZE', '1000'))
+MAX_REDIRECTS = 5
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+USER_AGENT = 'devlinks-link-checker/1.0'
+
+
+class BlockedAddress(OSError):
+    pass
+
+
+def _ip_address(host):
+    """The host as an ip_address, or None for a name"""
+    try:
+        return ipaddress.ip_address(host.split('%')[0])
+    except ValueError:
+        return None
+
+
+class PublicResolver(ThreadedResolver):
+    """DNS resolver that drops private, loopback and link-local addresses
+
+    Filtering the addresses the connector actually connects to (rather than
+    resolving twice) means a host can't swap in an internal address between
+    the check and the request.
+    """
+
+    async def resolve(self, host, port=0, family=0):
+        addresses = [
+            address for address in await super().resolve(host, port, family)
+            if (_ip_address(address['host']) or ipaddress.ip_address('0.0.0.0')).is_global
+        ]
+        if not addresses:
+            raise BlockedAddress(f"{host} resolves to a non-public address")
+        return addresses
+
+
+class CheckResult:
+    __slots__ = ('ok', 'status_code', 'error', 'latency_ms')
+
+    def __init__(self, ok, status_code=None, error=None, latency_ms=None):
+        self.ok = ok
+        self.status_code = status_code
+        self.error = error
+        self.latency_ms = latency_ms
+
+
+class CheckSummary:
+    def __init__(self):
+        self.checked = 0
+        self.ok = 0
+        self.broken = 0
+        self.seconds = 0.0
+        self.errors = {}  # error/status -> count
+
+    def add(self, result):
+        self.checked += 1
+        if result.ok:
+            self.ok += 1
+            return
+        self.broken += 1
+        reason = result.error or f'HTTP {result.status_code}'
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def to_dict(self):
+        return {
+            'checked': self.checked,
+            'ok': self.ok,
+            'broken': self.broken,
+            'seconds': round(self.seconds, 2),
+            'per_second': round(self.checked / self.seconds, 1) if self.seconds else 0.0,
+            'errors': dict(sorted(self.errors.items(), key=lambda item: -item[1]))
+        }
+
+
+class LinkChecker:
+    """Checks stored link URLs and records the outcome in link_health
+
+    Links are streamed from a server-side cursor `batch_size` rows at a time
+    and fed through a bounded queue to `concurrency` asyncio workers sharing
+    one aiohttp connection pool (at most `concurrency` connections, `per_host`
+    per host). A HEAD is sent first - GET when the server refuses HEAD,
+    without reading the body - and redirects are followed by hand so every
+    hop is checked. Results are upserted in batches on a writer thread of
+    their own, so the event loop keeps checking while a batch commits and
+    memory stays flat however many links there are.
+
+    URLs on private, loopback or link-local addresses are not fetched unless
+    `allow_private` is set (e.g. against a local stub server).
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 batch_size=DEFAULT_BATCH_SIZE, allow_private=False):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.allow_private = allow_private
+
+    def pending_links(self, max_age):
+        """Links never checked, checked more than max_age seconds ago or edited since"""
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=max_age)
+        return (
+            db.select(UserLink.id, UserLink.url, db.func.coalesce(LinkHealth.consecutive_failures, 0))
+            .outerjoin(LinkHealth, LinkHealth.link_id == UserLink.id)
+            .where(db.or_(
+                LinkHealth.link_id.is_(None),
+                LinkHealth.checked_at < cutoff,
+                LinkHealth.url != UserLink.url,
+            ))
+        )
+
+    def run(self, max_age=86400):
+        """Check every pending link, return a CheckSummary (needs an app context)"""
+        return asyncio.run(self._run(max_age))
+
+    async def _run(self, max_age):
+        summary = CheckSummary()
+        started = time.perf_counter()
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results = []
+        loop = asyncio.get_running_loop()
+        app = current_app._get_current_object()
+        # One writer thread: batches commit in order, one connection at a time
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='link-health-writer')
+
+        def save(rows):
+            with app.app_context():
+                self._save(rows)
+
+        try:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300,
+                resolver=None if self.allow_private else PublicResolver()
+            )
+            async with aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT}
+            ) as session:
+                async def worker():
+                    while True:
+                        row = await queue.get()
+                        if row is None:
+                            return
+                        link_id, url, failures = row
+                        result = await self.check(session, url)
+                        summary.add(result)
+                        results.append(self._row(link_id, url, failures, result))
+                        if len(results) >= self.batch_size:
+                            batch = results[:]
+                            results.clear()
+                            await loop.run_in_executor(writer, save, batch)
+
+                workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+                try:
+                    # A connection of its own: committing results must not close the cursor
+                    with db.engine.connect() as conn:
+                        rows = conn.execution_options(stream_results=True, max_row_buffer=self.batch_size).execute(
+                            self.pending_links(max_age)
+                        )
+                        for partition in rows.partitions(self.batch_size):
+                            for row in partition:
+                                await queue.put(tuple(row))
+                    for _ in workers:
+                        await queue.put(None)
+                    await asyncio.gather(*workers)
+                finally:
+                    for task in workers:
+                        task.cancel()
+
+            if results:
+                await loop.run_in_executor(writer, save, results)
+        finally:
+            writer.shutdown(wait=True)
+        summary.seconds = time.perf_counter() - started
+        return summary
+
+    async def check(self, session, url):
+        """Fetch one URL, following redirects - returns a CheckResult"""
+        start = time.perf_counter()
+        method = 'HEAD'
+        try:
+            target = URL(url)
+            for _ in range(MAX_REDIRECTS + 1):
+                if target.scheme not in ('http', 'https') or not target.host:
+                    return CheckResult(False, error='unsupported url')
+                # IP literals never reach the resolver
+                address = _ip_address(target.host)
+                if address is not None and not address.is_global and not self.allow_private:
+                    return CheckResult(False, error='blocked address')
+
+                status, location = await self._fetch(session, method, target)
+                if method == 'HEAD' and status in (405, 501):
+                    method = 'GET'  # server refuses HEAD
+                    status, location = await self._fetch(session, method, target)
+
+                if status in REDIRECT_STATUSES and location:
+                    target = target.join(URL(location))
+                    continue
+                latency_ms = int((time.perf_counter() - start) * 1000)
+                return CheckResult(status < 400, status, latency_ms=latency_ms)
+            return CheckResult(False, error='too many redirects')
+        except asyncio.TimeoutError:
+            return CheckResult(False, error='timeout')
+        except aiohttp.ClientConnectorError as e:
+            blocked = isinstance(e.os_error, BlockedAddress)
+            return CheckResult(False, error='blocked address' if blocked else 'connection failed')
+        except aiohttp.InvalidURL:
+            return CheckResult(False, error='invalid url')
+        except aiohttp.ClientError as e:
+            return CheckResult(False, error=type(e).__name__)
+        except (OSError, ValueError) as e:
+            return CheckResult(False, error=str(e)[:200] or type(e).__name__)
+
+    async def _fetch(self, session, method, url):
+        # Only the status matters - a GET's body is never read
+        async with session.request(method, url, allow_redirects=False) as response:
+            return response.status, response.headers.get('Location')
+
+    def prune(self):
+        """Delete results of links that no longer exist, return how many"""
+        result = db.session.execute(
+            db.delete(LinkHealth).where(~db.select(UserLink.id).where(UserLink.id == LinkHealth.link_id).exists())
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def _row(self, link_id, url, failures, result):
+        return {
+            'link_id': link_id,
+            'url': url,
+            'ok': result.ok,
+            'status_code': result.status_code,
+            'error': result.error,
+            'latency_ms': result.latency_ms,
+            'consecutive_failures': 0 if result.ok else failures + 1,
+            'checked_at': datetime.now(timezone.utc).replace(tzinfo=None),
+        }
+
+    def _save(self, rows):
+        """Upsert a batch of results with one multi-row statement"""
+        dialect = db.session.get_bind().dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = insert(LinkHealth.__table__).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['link_id'],
+            set_={column: stmt.excluded[column] for column in rows[0] if column != 'link_id'}
+        )
+        try:
+            db.session.execute(stmt)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
@@ -0,0 +1,102 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from src.models.models import Platform
+from src.models.serializers import PLATFORM_SCHEMA
+from src.database.replicas import replica_router
+
+
+class PlatformCatalog:
+    """Process-wide cache of the platforms table
+
+    The catalog is tiny and read-mostly, so it is loaded with a single SELECT
+    the first time it is needed and then served from memory. Writes through the
+    platforms blueprint call invalidate(); the TTL makes other worker processes
+    pick up those writes eventually.
+    """
+
+    # Minimum seconds between reloads triggered by unknown platform ids
+    MISS_RELOAD_INTERVAL = 1.0
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl if ttl is not None else int(os.getenv('PLATFORM_CACHE_TTL', '300'))
+        self._lock = threading.Lock()
+        # (by_id, payloads, etag, loaded_at) - replaced as a whole so readers
+        # never see a half-built catalog
+        self._state = None
+
+    def _is_fresh(self, state):
+        return state is not None and (time.monotonic() - state[3]) < self.ttl
+
+    def _load(self):
+        """Read every platform row and build a new catalog state"""
+        # From the primary: a reload right after an edit must not see a lagging replica
+        with replica_router.primary():
+            platforms = Platform.query.order_by(Platform.name).all()
+        payloads = PLATFORM_SCHEMA.dump_many(platforms)
+        etag = hashlib.sha1(
+            json.dumps(payloads, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+        by_id = {payload['id']: payload for payload in payloads}
+        return by_id, payloads, etag, time.monotonic()
+
+    def _current(self):
+        state = self._state
+        if self._is_fresh(state):
+            return state
+        with self._lock:
+            state = self._state
+            if not self._is_fresh(state):
+                state = self._load()
+                self._state = state
+            return state
+
+    def is_fresh(self):
+        """True if reads will be served from memory without reloading"""
+        return self._is_fresh(self._state)
+
+    def needs_reload(self, platform_ids=()):
+        """True if reading the catalog (and looking up `platform_ids`) may query the database"""
+        state = self._state
+        if not self._is_fresh(state):
+            return True
+        return time.monotonic() - state[3] >= self.MISS_RELOAD_INTERVAL and any(
+            platform_id not in state[0] for platform_id in platform_ids
+        )
+
+    def refresh(self):
+        """Reload the catalog now (needs an app context)"""
+        with self._lock:
+            self._state = self._load()
+
+    def get(self, platform_id):
+        """Return the serialized payload for a platform id, or None if unknown"""
+        state = self._current()
+        payload = state[0].get(platform_id)
+        if payload is None and time.monotonic() - state[3] >= self.MISS_RELOAD_INTERVAL:
+            # Probably added by another worker - reload rather than wait for the TTL
+            with self._lock:
+                if self._state is state:
+                    self._state = self._load()
+                state = self._state
+            payload = state[0].get(platform_id)
+        return dict(payload) if payload is not None else None
+
+    def all(self):
+        """Return the payloads of every platform, ordered by name"""
+        return [dict(payload) for payload in self._current()[1]]
+
+    @property
+    def etag(self):
+        """Content hash of the catalog, changes whenever a platform changes"""
+        return self._current()[2]
+
+    def invalidate(self):
+        """Drop the cached catalog so the next read reloads it"""
+        with self._lock:
+            self._state = None
+
+
+platform_catalog = PlatformCatalog()
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+
+class Histogram:
+    """Cumulative histogram with fixed upper bounds (Prometheus style)"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    def snapshot(self):
+        """Return {'buckets': [(bound, cumulative_count)], 'count', 'sum'}"""
+        with self._lock:
+            cumulative = []
+            total = 0
+            for bound, count in zip(self.buckets, self.counts):
+                total += count
+                cumulative.append(('+Inf' if bound == float('inf') else bound, total))
+            return {'buckets': cumulative, 'count': self.count, 'sum': self.sum}
+
+
+class PoolMetrics:
+    """Counters fed by InstrumentedQueuePool and pool events"""
+
+    WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkout_wait = Histogram(self.WAIT_BUCKETS)
+        self.connections_created = 0
+        self.connections_invalidated = 0
+        self.checkout_timeouts = 0
+
+    def increment(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def snapshot(self, pool=None):
+        data = {
+            'connections_created': self.connections_created,
+            'connections_invalidated': self.connections_invalidated,
+            'checkout_timeouts': self.checkout_timeouts,
+            'checkout_wait_seconds': self.checkout_wait.snapshot()
+        }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow()
+            })
+        return data
+
+
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited"""
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            pool_metrics.increment('checkout_timeouts')
+            raise
+        finally:
+            pool_metrics.checkout_wait.observe(time.perf_counter() - start)
+
+
+@event.listens_for(InstrumentedQueuePool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    pool_metrics.increment('connections_created')
+
+
+@event.listens_for(InstrumentedQueuePool, 'invalidate')
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    pool_metrics.increment('connections_invalidated')
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+def engine_options_from_env(database_uri):
+    """SQLALCHEMY_ENGINE_OPTIONS built from DB_POOL_* environment variables
+
+    Size the pool so that workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below
+    the server's max_connections.
+    """
+    options = {
+        'pool_pre_ping': _env_flag('DB_POOL_PRE_PING', 'true'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    }
+
+    # SQLite (local runs) uses its own single-connection pools
+    if database_uri and not database_uri.startswith('sqlite'):
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        })
+
+    return options
@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import time
+from src.models.serializers import PUBLIC_USER_SCHEMA, dumps_json
+from src.database.platform_cache import platform_catalog
+
+
+class PublicProfileCache:
+    """Bounded LRU cache of rendered public profile JSON, keyed by user id
+
+    Entries hold the already-serialized response body and its ETag, so a hit
+    needs no ORM work at all. Each entry is stamped with what it was rendered
+    from - the user's updated_at and the platform catalog's etag (see
+    `profile_stamp`). For PUBLIC_PROFILE_CACHE_FRESH seconds after it was
+    rendered or last checked, an entry is served without any query; after
+    that a reader looks up users.updated_at and serves the entry only if the
+    stamp still matches, which starts a new fresh window.
+
+    So an edit made through another worker process shows up within the fresh
+    window (5 seconds by default); invalidate() makes this process's own
+    edits show up at once.
+    """
+
+    def __init__(self, maxsize=None, ttl=None, fresh=None):
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv('PUBLIC_PROFILE_CACHE_SIZE', '10000'))
+        self.ttl = ttl if ttl is not None else int(os.getenv('PUBLIC_PROFILE_CACHE_TTL', '60'))
+        self.fresh = fresh if fresh is not None else float(os.getenv('PUBLIC_PROFILE_CACHE_FRESH', '5'))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (body, etag, stamp, expires_at, checked_at)
+
+    def get(self, user_id, stamp=None):
+        """Return (body, etag) or None
+
+        Without `stamp` only a fresh entry rendered with the current platform
+        catalog is returned. With it, an entry rendered at `stamp`, which is
+        then fresh again.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[3] <= now or (stamp is not None and entry[2] != stamp):
+                del self._entries[user_id]
+                return None
+            if stamp is None:
+                if now - entry[4] >= self.fresh or entry[2][1] != platform_catalog.etag:
+                    return None
+            else:
+                self._entries[user_id] = entry[:4] + (now,)
+            self._entries.move_to_end(user_id)
+            return entry[0], entry[1]
+
+    def put(self, user_id, stamp, body):
+        """Store a body rendered at `stamp`, return its ETag"""
+        etag = hashlib.sha1(body).hexdigest()
+        with self._lock:
+            now = time.monotonic()
+            self._entries[user_id] = (body, etag, stamp, now + self.ttl, now)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every entry, e.g. after a platform shown on all profiles changed"""
+        with self._lock:
+            self._entries.clear()
+
+
+public_profile_cache = PublicProfileCache()
+
+
+def render_public_profile(user):
+    """Serialize a user's public profile to the cached response body"""
+    return dumps_json({"user": PUBLIC_USER_SCHEMA.dump(user)})
+
+
+def profile_stamp(updated_at):
+    """Cache stamp of a public profile last changed at `updated_at`
+
+    Platform names and icons are part of the profile, so the catalog's etag
+    is in it too.
+    """
+    return (updated_at, platform_catalog.etag)
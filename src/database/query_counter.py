@@ -0,0 +1,35 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from src.models.models import db
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while it is active"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Count statements sent to the database inside a `with` block
+
+    Usage:
+        with count_queries() as counter:
+            client.get('/api/auth/profile', headers=headers)
+        print(counter.count, counter.statements)
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._before_cursor_execute)
@@ -0,0 +1,293 @@
+from collections import OrderedDict
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, Signer
+from sqlalchemy import event, text
+import itertools
+import os
+import threading
+import time
+
+READ_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+# Signed "read from the primary until <epoch seconds>" set on a client's writes
+STICKY_COOKIE = 'db_primary_until'
+
+# Seconds behind the primary, 0 when the replica has replayed all WAL it received
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replica_urls_from_env():
+    """DATABASE_REPLICA_URLS is a comma separated list of read replica URLs"""
+    return [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+
+
+class ReplicaState:
+    __slots__ = ('name', 'engine', 'healthy', 'lag', 'checked_at', 'reads', 'error')
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.lag = 0.0
+        self.checked_at = 0.0
+        self.reads = 0
+        self.error = None
+
+
+class ReplicaRouter:
+    """Sends the reads of GET requests to a healthy replica
+
+    Everything else uses the primary: writes and flushes, non-GET requests
+    (so SELECT ... FOR UPDATE never reaches a replica), work outside a
+    request (CLI, bulk import, migrations) and code wrapped in `primary()`.
+    A client that wrote recently is pinned to the primary for `sticky_seconds`
+    so it reads its own writes: the deadline travels in a signed cookie, so
+    whichever worker process serves the next request honours it. Writes are
+    also remembered per user in this process, for reads of that user's data
+    by other clients (`for_user`). Replicas are health checked at most every
+    `check_interval` seconds and skipped while down or lagging by more than
+    `max_lag` seconds; with no healthy replica reads fall back to the primary.
+
+    `sticky_seconds` should cover the replication lag tolerated by `max_lag`.
+    """
+
+    def __init__(self, max_lag=None, check_interval=None, sticky_seconds=None, sticky_size=None):
+        self.max_lag = max_lag if max_lag is not None else float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+        self.check_interval = check_interval if check_interval is not None else float(os.getenv('REPLICA_CHECK_INTERVAL', '5'))
+        self.sticky_seconds = sticky_seconds if sticky_seconds is not None else float(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+        self.sticky_size = sticky_size if sticky_size is not None else int(os.getenv('REPLICA_STICKY_SIZE', '10000'))
+        self.replicas = []
+        self.primary_reads = 0
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._sticky = OrderedDict()  # user_id -> pinned until (monotonic)
+        self._local = threading.local()
+        self._next = itertools.count()
+        self._signer = None
+
+    @property
+    def enabled(self):
+        return bool(self.replicas)
+
+    def init_app(self, app, db):
+        """Pick up the replica_* binds and register the stickiness hook"""
+        with app.app_context():
+            self.replicas = [
+                ReplicaState(name, db.engines[name])
+                for name in sorted(app.config.get('SQLALCHEMY_BINDS') or {})
+                if name.startswith('replica_')
+            ]
+        for replica in self.replicas:
+            event.listen(replica.engine, 'handle_error', self._on_error(replica))
+        secret = app.secret_key or os.getenv('JWT_SECRET_KEY', 'your-secret-key')
+        self._signer = Signer(secret, salt='replica-sticky')
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _on_error(self, replica):
+        def handle_error(context):
+            if context.is_disconnect:
+                self._mark_down(replica, context.original_exception)
+        return handle_error
+
+    def _mark_down(self, replica, error):
+        replica.healthy = False
+        replica.error = str(error)
+        replica.checked_at = time.monotonic()
+
+    # Read-your-writes
+
+    def mark_written(self, user_id):
+        """Pin `user_id` to the primary until replicas have caught up"""
+        if not self.enabled or user_id is None:
+            return
+        with self._lock:
+            self._sticky[user_id] = time.monotonic() + self.sticky_seconds
+            self._sticky.move_to_end(user_id)
+            while len(self._sticky) > self.sticky_size:
+                self._sticky.popitem(last=False)
+
+    def is_sticky(self, user_id):
+        until = self._sticky.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def sticky_cookie_valid(self, cookie):
+        """True if `cookie` is an unexpired STICKY_COOKIE value signed by this app"""
+        if not cookie or self._signer is None:
+            return False
+        try:
+            until = float(self._signer.unsign(cookie))
+        except (BadSignature, ValueError):
+            return False
+        return until > time.time()
+
+    def _before_request(self):
+        if self.enabled and self.sticky_cookie_valid(request.cookies.get(STICKY_COOKIE)):
+            g.db_sticky = True
+
+    def _after_request(self, response):
+        if request.method not in READ_METHODS and response.status_code < 400:
+            self.mark_written(g.get('principal_id'))
+            if self.enabled:
+                until = f'{time.time() + self.sticky_seconds:.3f}'
+                response.set_cookie(
+                    STICKY_COOKIE, self._signer.sign(until).decode('ascii'),
+                    max_age=int(self.sticky_seconds) + 1, httponly=True, samesite='Lax'
+                )
+        return response
+
+    @contextmanager
+    def primary(self):
+        """Route every read in this block to the primary"""
+        depth = getattr(self._local, 'primary', 0)
+        self._local.primary = depth + 1
+        try:
+            yield
+        finally:
+            self._local.primary = depth
+
+    @contextmanager
+    def for_user(self, user_id):
+        """Read `user_id`'s data from the primary if they wrote recently"""
+        if self.enabled and self.is_sticky(user_id):
+            with self.primary():
+                yield
+        else:
+            yield
+
+    # Routing
+
+    def read_engine(self):
+        """Replica engine for the current read, or None for the primary"""
+        if not self.replicas or not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if getattr(self._local, 'primary', 0) or g.get('db_sticky'):
+            return None
+        principal_id = g.get('principal_id')
+        if principal_id is not None and self.is_sticky(principal_id):
+            return None
+
+        # One replica per request, so its reads see a single snapshot source
+        if 'db_replica' not in g:
+            g.db_replica = self._pick()
+        replica = g.db_replica
+        if replica is None or not replica.healthy:
+            self.primary_reads += 1
+            return None
+        replica.reads += 1
+        return replica.engine
+
+    def _pick(self, probe=True):
+        start = next(self._next)
+        for offset in range(len(self.replicas)):
+            replica = self.replicas[(start + offset) % len(self.replicas)]
+            if probe:
+                self._maybe_check(replica)
+            if replica.healthy:
+                return replica
+        return None
+
+    def replica_for_read(self, sticky=False, user_id=None):
+        """Replica for a read made outside a Flask request (the ASGI app), None for the primary
+
+        Goes by the last health checks only, so it never blocks; run probe()
+        in a thread when `probe_due()`.
+        """
+        if not self.replicas:
+            return None
+        replica = None
+        if not sticky and not (user_id is not None and self.is_sticky(user_id)):
+            replica = self._pick(probe=False)
+        if replica is None:
+            self.primary_reads += 1
+            return None
+        replica.reads += 1
+        return replica
+
+    def probe_due(self):
+        now = time.monotonic()
+        return any(now - replica.checked_at >= self.check_interval for replica in self.replicas)
+
+    def probe(self):
+        """Re-check the replicas whose last check is older than `check_interval`"""
+        for replica in self.replicas:
+            self._maybe_check(replica)
+
+    def _maybe_check(self, replica):
+        if time.monotonic() - replica.checked_at < self.check_interval:
+            return
+        # One thread re-checks, the others keep using the last result
+        if not self._check_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - replica.checked_at >= self.check_interval:
+                self.check(replica)
+        finally:
+            self._check_lock.release()
+
+    def check(self, replica):
+        """Probe a replica: reachable and no further behind than max_lag"""
+        try:
+            with replica.engine.connect() as conn:
+                if conn.dialect.name == 'postgresql':
+                    lag = float(conn.execute(REPLICA_LAG_QUERY).scalar() or 0)
+                else:
+                    conn.execute(text('SELECT 1'))
+                    lag = 0.0
+        except Exception as e:
+            print(f"Replica {replica.name} check failed: {e}")
+            self._mark_down(replica, e)
+            return
+
+        replica.lag = lag
+        replica.healthy = lag <= self.max_lag
+        replica.error = None if replica.healthy else f'lagging {lag:.1f}s'
+        replica.checked_at = time.monotonic()
+
+    def snapshot(self):
+        return {
+            'primary_reads': self.primary_reads,
+            'sticky_users': len(self._sticky),
+            'replicas': [
+                {
+                    'name': replica.name,
+                    'healthy': replica.healthy,
+                    'lag_seconds': round(replica.lag, 3),
+                    'reads': replica.reads,
+                    'error': replica.error,
+                    'pool': replica.engine.pool.status(),
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that lets the replica router pick the engine"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not self.info.get('wrote'):
+            engine = replica_router.read_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    # Reads after a write in the same transaction must see it
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+@event.listens_for(RoutingSession, 'after_rollback')
+def _after_transaction(session):
+    session.info.pop('wrote', None)
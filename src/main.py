@@ -3,43 +3,118 @@ import os
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# First, so the startup profile's import time covers everything below
+from src.startup import StartupProfile, LazyMigrateGroup, env_flag
 from flask import Flask
-from flask_migrate import Migrate
-from src.database.db import init_db
+from src.database.db import init_db, create_tables
+from src.database.pool import engine_options_from_env
+from src.database.replicas import replica_router, replica_urls_from_env
+from src.database.cli import users_cli, jobs_cli, links_cli
+from src.database.jobs import init_jobs, job_queue
+from src.database.clicks import init_clicks
+from src.database.email_filter import init_email_filter
+from src.middleware.metrics import init_metrics
+from src.middleware.compression import init_compression
+from src.middleware.body_limit import init_body_limit
 from src.models.models import db
+from src.models.serializers import FastJSONProvider
 from dotenv import load_dotenv
 from src.routers.auth import auth_blueprint
 from src.routers.users import users_blueprint
 from src.routers.platform import platforms_blueprint
 from src.routers.admin import admin_blueprint
+from src.routers.images import images_blueprint
+from src.routers.links import links_blueprint
 
 load_dotenv()
 
-def create_app():
-    app = Flask(__name__)
-    
-    # SQLAlchemy configuration
-    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def create_app(create_schema=None):
+    profile = StartupProfile()
+
+    with profile.phase('flask'):
+        app = Flask(__name__)
+        # orjson-backed jsonify(), UUID/datetime encoded natively
+        app.json = FastJSONProvider(app)
+
+    if create_schema is None:
+        # The schema comes from migrations; DB_CREATE_ALL=true builds it
+        # with db.create_all() instead (throwaway/dev databases)
+        create_schema = env_flag('DB_CREATE_ALL', 'false')
     
-    # Initialize database - much simpler now!
-    init_db(app)
+    with profile.phase('database'):
+        # SQLAlchemy configuration
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv("DATABASE_URL")
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        # Connection pool sizing, pre-ping and recycle (DB_POOL_* env vars)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(app.config['SQLALCHEMY_DATABASE_URI'])
+        # Read replicas (DATABASE_REPLICA_URLS) become the replica_0..N binds
+        app.config['SQLALCHEMY_BINDS'] = {
+            f'replica_{i}': dict(engine_options_from_env(url), url=url)
+            for i, url in enumerate(replica_urls_from_env())
+        }
+
+        # Initialize database - much simpler now!
+        init_db(app, create_schema=False)
+
+        # GET reads -> healthy replica, everything else -> primary
+        replica_router.init_app(app, db)
+
+    if create_schema:
+        with profile.phase('create_all'):
+            create_tables(app)
     
-    # Initialize Flask-Migrate
-    migrate = Migrate(app, db)
+    with profile.phase('middleware'):
+        # Request latency, SQL and bcrypt instrumentation + /metrics
+        init_metrics(app)
 
-    @app.route("/", methods=['GET'])
-    def home():
-        return "hello world!"
+        # gzip/brotli by Accept-Encoding; registered after metrics so the size
+        # histogram sees compressed bytes
+        init_compression(app)
 
-    app.register_blueprint(auth_blueprint, url_prefix="/api/auth")
-    app.register_blueprint(users_blueprint, url_prefix='/api/users')
-    app.register_blueprint(platforms_blueprint, url_prefix='/api/platforms')
-    app.register_blueprint(admin_blueprint, url_prefix='/api/admin')
+        # 413 for bodies over REQUEST_MAX_BYTES, before anything parses them
+        init_body_limit(app)
 
-    return app
+    with profile.phase('cli'):
+        # flask db ... - Flask-Migrate/Alembic are only imported when it runs
+        app.cli.add_command(LazyMigrateGroup(app, db))
+
+        # Bulk import/export commands: flask users import|export
+        app.cli.add_command(users_cli)
 
+        # Background job workers (flask jobs work runs dedicated ones)
+        app.cli.add_command(jobs_cli)
+
+        # Dead link detection: flask links check
+        app.cli.add_command(links_cli)
+
+    with profile.phase('background'):
+        init_jobs(app)
+
+        # Write-behind click counters for the /l/<link_id> redirect
+        init_clicks(app)
+
+        # Bloom filter of registered emails behind /api/auth/email-available
+        init_email_filter(app)
+
+    with profile.phase('blueprints'):
+        @app.route("/", methods=['GET'])
+        def home():
+            return "hello world!"
+
+        app.register_blueprint(auth_blueprint, url_prefix="/api/auth")
+        app.register_blueprint(users_blueprint, url_prefix='/api/users')
+        app.register_blueprint(platforms_blueprint, url_prefix='/api/platforms')
+        app.register_blueprint(admin_blueprint, url_prefix='/api/admin')
+        app.register_blueprint(images_blueprint, url_prefix='/api/images')
+        app.register_blueprint(links_blueprint, url_prefix='/l')
+
+    profile.finish()
+    app.extensions['startup'] = profile
+    return app
 
 if __name__ == '__main__':
+    # Single process: run the background jobs here unless told otherwise
+    if 'JOB_WORKER_THREADS' not in os.environ:
+        job_queue.threads = 1
     app = create_app()
     app.run(port=5001, debug=True, use_reloader=False, threaded=True)
\ No newline at end of file
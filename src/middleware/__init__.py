@@ -1,12 +1,18 @@
 # Middleware package
 
 # Import all middleware functions for easy access
-from .auth import jwt_required, admin_required
-from .utils import validate_json, cors_headers
+from .auth import jwt_required, admin_required, token_cache, Principal
+from .utils import validate_json, cors_headers, parse_json, validation_error
+from .rate_limit import rate_limiter
 
 __all__ = [
     'jwt_required',
     'admin_required', 
+    'token_cache',
+    'Principal',
     'validate_json',
-    'cors_headers'
+    'cors_headers',
+    'parse_json',
+    'validation_error',
+    'rate_limiter'
 ]
\ No newline at end of file
@@ -1,94 +1,266 @@
-from flask import request, jsonify
+from flask import g, request, jsonify
 from functools import wraps
-from src.models.models import User
+from collections import OrderedDict
+from sqlalchemy.orm import selectinload
+from src.models.models import User, db
+from src.database.replicas import replica_router
+import os
+import threading
+import time
 import uuid
 
 
-def jwt_required(f):
-    """Decorator to protect routes with JWT authentication"""
+class Principal:
+    """Lightweight authenticated identity built from a verified token
+
+    Handlers decorated with `stateless=True` receive this instead of a loaded
+    User, so no database query is needed to authenticate the request.
+    """
+    __slots__ = ('id', 'email', 'is_admin', 'version')
+
+    def __init__(self, id, email, is_admin, version=0):
+        self.id = id
+        self.email = email
+        self.is_admin = is_admin
+        self.version = version
+
+    def __repr__(self):
+        return f'<Principal {self.email}>'
+
+
+class TokenCache:
+    """Bounded LRU cache of verified tokens -> Principal
+
+    Entries live for at most `ttl` seconds and never past the token's own
+    `exp`, so a cached token can't outlive its signature. Each miss checks the
+    user's token_version in the database, so a token revoked in another
+    worker process (password change, deleted user) stops working within
+    `ttl` seconds; revocations in this process apply immediately.
+    """
+
+    def __init__(self, maxsize=None, ttl=None):
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv('JWT_CACHE_SIZE', '10000'))
+        self.ttl = ttl if ttl is not None else int(os.getenv('JWT_CACHE_TTL', '60'))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # token -> (principal, expires_at, issued_at)
+        self._revoked = {}  # user_id -> revoked_at (epoch seconds)
+
+    def get(self, token):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token, principal, exp, issued_at):
+        expires_at = min(time.time() + self.ttl, exp)
+        with self._lock:
+            self._entries[token] = (principal, expires_at, issued_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        """Drop every cached token that belongs to `user_id`"""
+        with self._lock:
+            stale = [token for token, entry in self._entries.items() if entry[0].id == user_id]
+            for token in stale:
+                del self._entries[token]
+
+    def revoke_user(self, user_id, token_version=None):
+        """Reject every token issued to `user_id` up to now (e.g. user deleted)
+
+        With `token_version` (the user's new, committed version) only tokens
+        carrying an older version are rejected, so a token issued in the same
+        second, e.g. on a password change, keeps working.
+        """
+        self.invalidate_user(user_id)
+        with self._lock:
+            self._revoked[user_id] = (time.time(), token_version)
+            # Only keep revocations that can still match an unexpired token
+            max_age = User.TOKEN_LIFETIME.total_seconds()
+            cutoff = time.time() - max_age
+            for revoked_id in [k for k, v in self._revoked.items() if v[0] < cutoff]:
+                del self._revoked[revoked_id]
+
+    def is_revoked(self, user_id, issued_at, version=0):
+        revoked = self._revoked.get(user_id)
+        if revoked is None:
+            return False
+        revoked_at, token_version = revoked
+        if token_version is not None:
+            return version < token_version
+        return issued_at <= revoked_at
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
+
+
+token_cache = TokenCache()
+
+
+def parse_authorization(auth_header):
+    """Return (token, error) from an Authorization header value
+
+    `error` is a (message, status) pair so both the Flask and ASGI entry
+    points can turn it into their own response type.
+    """
+    if auth_header is None:
+        return None, ('Token is missing', 401)
+
+    try:
+        token = auth_header.split(" ")[1]  # Bearer <token>
+    except IndexError:
+        return None, ('Invalid token format', 401)
+
+    if not token:
+        return None, ('Token is missing', 401)
+    return token, None
+
+
+def token_revoked(principal, token_version):
+    """True if `principal`'s token predates the user's current token_version"""
+    return principal.version < (token_version or 0)
+
+
+def _current_state(user_id):
+    """(token_version, is_admin) of `user_id` on the primary, None if the user is gone"""
+    with replica_router.primary():
+        return db.session.execute(
+            db.select(User.token_version, User.is_admin).where(User.id == user_id)
+        ).first()
+
+
+def verify_principal(token, fresh=False, check_user=True):
+    """Return (principal, error), decoding the token only on a cache miss
+
+    A miss (or `fresh=True`) checks the token against the user's row with one
+    primary key lookup; `check_user=False` skips that for callers which load
+    the user themselves, check `token_revoked` and invalidate_user() on a
+    revoked token.
+    """
+    principal = None if fresh else token_cache.get(token)
+    if principal is not None:
+        return principal, None
+
+    payload = User.verify_token(token)
+    if payload is None:
+        return None, ('Token is invalid or expired', 401)
+
+    # Convert string UUID back to UUID object
+    try:
+        user_id = uuid.UUID(payload['user_id'])
+    except ValueError:
+        return None, ('Invalid user ID in token', 401)
+
+    issued_at = payload.get('iat', 0)
+    version = payload.get('ver', 0)
+    if token_cache.is_revoked(user_id, issued_at, version):
+        return None, ('Token is invalid or expired', 401)
+
+    principal = Principal(user_id, payload.get('email'), payload.get('is_admin', False), version)
+    if not check_user:
+        token_cache.put(token, principal, payload['exp'], issued_at)
+        return principal, None
+
+    state = _current_state(user_id)
+    if state is None:
+        token_cache.invalidate_user(user_id)
+        return None, ('User not found', 401)
+    if token_revoked(principal, state.token_version):
+        token_cache.invalidate_user(user_id)
+        return None, ('Token is invalid or expired', 401)
+    # An admin flag removed since the token was issued no longer counts
+    principal.is_admin = principal.is_admin and state.is_admin
+
+    token_cache.put(token, principal, payload['exp'], issued_at)
+    return principal, None
+
+
+def _error_response(error):
+    message, status = error
+    return jsonify({'error': message}), status
+
+
+def _authenticate(stateless, require_admin, load_links=False):
+    """Return (current_user, error_response) for the current request"""
+    token, error = parse_authorization(request.headers.get('Authorization'))
+    if error:
+        return None, _error_response(error)
+
+    # Admin routes always check the token against the database; routes that
+    # load the User check it against that row instead
+    principal, error = verify_principal(token, fresh=require_admin, check_user=stateless or require_admin)
+    if error:
+        return None, _error_response(error)
+
+    # Lets the replica router keep this user's reads on the primary after a write
+    g.principal_id = principal.id
+
+    # Admin flag from the token, confirmed against the user's row above
+    if require_admin and not principal.is_admin:
+        return None, _error_response(('Admin access required', 403))
+
+    if stateless:
+        return principal, None
+
+    query = User.query.filter_by(id=principal.id)
+    if load_links:
+        query = query.options(selectinload(User.user_links))
+    current_user = query.first()
+    if not current_user:
+        token_cache.invalidate_user(principal.id)
+        return None, _error_response(('User not found', 401))
+    if token_revoked(principal, current_user.token_version):
+        token_cache.invalidate_user(principal.id)
+        return None, _error_response(('Token is invalid or expired', 401))
+
+    return current_user, None
+
+
+def _auth_decorator(f, stateless, require_admin, log_label, load_links=False):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Check for token in Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
         try:
-            # Verify token
-            payload = User.verify_token(token)
-            if payload is None:
-                return jsonify({'error': 'Token is invalid or expired'}), 401
-            
-            # Get current user - convert string UUID back to UUID object
-            user_id_str = payload['user_id']
-            try:
-                user_uuid = uuid.UUID(user_id_str)
-                current_user = User.query.filter_by(id=user_uuid).first()
-            except ValueError:
-                return jsonify({'error': 'Invalid user ID in token'}), 401
-                
-            if not current_user:
-                return jsonify({'error': 'User not found'}), 401
-            
+            current_user, error = _authenticate(stateless, require_admin, load_links)
         except Exception as e:
-            print(f"Token verification error: {e}")  # Debug log
+            print(f"{log_label}: {e}")  # Debug log
             return jsonify({'error': 'Token verification failed'}), 401
-        
+
+        if error:
+            return error
+
         return f(current_user, *args, **kwargs)
-    
+
     return decorated
 
 
-def admin_required(f):
-    """Decorator to protect routes that require admin privileges"""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = None
-        
-        # Check for token in Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(" ")[1]  # Bearer <token>
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
-        
-        try:
-            # Verify token
-            payload = User.verify_token(token)
-            if payload is None:
-                return jsonify({'error': 'Token is invalid or expired'}), 401
-            
-            # Check if user is admin from token (no database query needed!)
-            if not payload.get('is_admin', False):
-                return jsonify({'error': 'Admin access required'}), 403
-            
-            # Get current user for the route function
-            user_id_str = payload['user_id']
-            try:
-                user_uuid = uuid.UUID(user_id_str)
-                current_user = User.query.filter_by(id=user_uuid).first()
-            except ValueError:
-                return jsonify({'error': 'Invalid user ID in token'}), 401
-                
-            if not current_user:
-                return jsonify({'error': 'User not found'}), 401
-            
-        except Exception as e:
-            print(f"Admin check error: {e}")
-            return jsonify({'error': 'Token verification failed'}), 401
-        
-        return f(current_user, *args, **kwargs)
-    
-    return decorated
\ No newline at end of file
+def jwt_required(f=None, *, stateless=False, load_links=False):
+    """Decorator to protect routes with JWT authentication
+
+    Use `@jwt_required(stateless=True)` for handlers that only need the
+    caller's id/email/admin flag: they receive a Principal and no User query
+    is made while the token is cached. `load_links=True` loads the user's
+    links with the User, for handlers that serialize the profile.
+    """
+    if f is None:
+        return lambda func: _auth_decorator(func, stateless, False, "Token verification error", load_links)
+    return _auth_decorator(f, stateless, False, "Token verification error", load_links)
+
+
+def admin_required(f=None, *, stateless=False):
+    """Decorator to protect routes that require admin privileges
+
+    The token is checked against the user's row on every request, so a
+    revoked token or a removed admin flag is refused right away.
+    """
+    if f is None:
+        return lambda func: _auth_decorator(func, stateless, True, "Admin check error")
+    return _auth_decorator(f, stateless, True, "Admin check error")
@@ -0,0 +1,56 @@
+from flask import request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
+import os
+
+# JSON bodies here are a few KiB; views that take uploads raise their own limit
+DEFAULT_MAX_BYTES = int(os.getenv('REQUEST_MAX_BYTES', str(64 * 1024)))
+
+
+def body_limit(max_bytes):
+    """Let a view accept request bodies up to `max_bytes` instead of REQUEST_MAX_BYTES
+
+    Goes directly under @route, above auth decorators.
+    """
+    def decorator(f):
+        f.max_body_bytes = max_bytes
+        return f
+    return decorator
+
+
+def _too_large(limit):
+    return jsonify({"error": f"Request body is larger than {limit} bytes"}), 413
+
+
+def init_body_limit(app, max_bytes=None):
+    """Reject oversized request bodies before anything reads or parses them
+
+    A Content-Length over the limit is answered with 413 before the view
+    runs, without reading the body. Chunked bodies (no Content-Length) are
+    read here, and reading stops with a 413 as soon as it passes the limit;
+    views taking uploads (@body_limit) stream their bodies themselves and
+    are only capped.
+    """
+    app.config['MAX_CONTENT_LENGTH'] = max_bytes if max_bytes is not None else DEFAULT_MAX_BYTES
+
+    @app.before_request
+    def reject_oversized_body():
+        view_limit = getattr(app.view_functions.get(request.endpoint), 'max_body_bytes', None)
+        if view_limit is not None:
+            request.max_content_length = view_limit
+        limit = request.max_content_length
+        if limit is None:
+            return None
+        if request.content_length is not None:
+            if request.content_length > limit:
+                return _too_large(limit)
+        elif view_limit is None and request.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            # The stream stops one byte past the limit, which tells a body of
+            # exactly `limit` bytes from a longer one; cached for the view
+            request.max_content_length = limit + 1
+            if len(request.get_data(cache=True)) > limit:
+                return _too_large(limit)
+        return None
+
+    @app.errorhandler(RequestEntityTooLarge)
+    def request_too_large(e):
+        return _too_large(request.max_content_length)
@@ -0,0 +1,156 @@
+from flask import request
+from collections import OrderedDict
+from src.database.pool import Histogram
+import gzip
+import os
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv',
+))
+COMPRESSION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, float('inf'))
+
+
+def parse_accept_encoding(header):
+    """Accept-Encoding value -> {coding: q}"""
+    codings = {}
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[name] = q
+    return codings
+
+
+class EncodingStats:
+    __slots__ = ('responses', 'bytes_in', 'bytes_out', 'cache_hits', 'seconds')
+
+    def __init__(self):
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cache_hits = 0
+        self.seconds = Histogram(COMPRESSION_BUCKETS)
+
+
+class Compressor:
+    """Negotiates and applies gzip/brotli with a cache of compressed bodies
+
+    Bodies shorter than `min_size` bytes are sent as-is (the headers would eat
+    the saving). Callers that know their body by a content key - a strong ETag
+    - get the compressed bytes from an LRU cache of `cache_size` entries, so
+    cacheable responses are compressed once per encoding, not once per hit.
+    """
+
+    def __init__(self, min_size=None, gzip_level=None, brotli_quality=None, cache_size=None):
+        self.min_size = min_size if min_size is not None else int(os.getenv('COMPRESS_MIN_SIZE', '500'))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+        self.cache_size = cache_size if cache_size is not None else int(os.getenv('COMPRESS_CACHE_SIZE', '2048'))
+        self.encodings = ('br', 'gzip') if brotli is not None else ('gzip',)
+        self.stats = {encoding: EncodingStats() for encoding in self.encodings}
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # (key, encoding) -> compressed bytes
+
+    def choose(self, accept_encoding):
+        """Best supported coding the client accepts, or None for identity"""
+        codings = parse_accept_encoding(accept_encoding)
+        wildcard = codings.get('*', 0.0)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:  # server preference order breaks ties
+            q = codings.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def compress(self, data, encoding):
+        if encoding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        # mtime=0 keeps the output deterministic for identical bodies
+        return gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+
+    def encode(self, data, accept_encoding, cache_key=None):
+        """Return (body, encoding); encoding is None when left uncompressed"""
+        if len(data) < self.min_size:
+            return data, None
+        encoding = self.choose(accept_encoding)
+        if encoding is None:
+            return data, None
+
+        stats = self.stats[encoding]
+        if cache_key is not None:
+            with self._lock:
+                body = self._cache.get((cache_key, encoding))
+                if body is not None:
+                    self._cache.move_to_end((cache_key, encoding))
+            if body is not None:
+                self._count(stats, data, body, cache_hit=True)
+                return body, encoding
+
+        start = time.perf_counter()
+        body = self.compress(data, encoding)
+        stats.seconds.observe(time.perf_counter() - start)
+        self._count(stats, data, body)
+
+        if cache_key is not None:
+            with self._lock:
+                self._cache[(cache_key, encoding)] = body
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return body, encoding
+
+    def _count(self, stats, data, body, cache_hit=False):
+        with self._lock:
+            stats.responses += 1
+            stats.bytes_in += len(data)
+            stats.bytes_out += len(body)
+            stats.cache_hits += cache_hit
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+compressor = Compressor()
+
+
+def _after_request(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    etag, weak = response.get_etag()
+    body, encoding = compressor.encode(
+        response.get_data(), request.headers.get('Accept-Encoding'),
+        cache_key=etag if etag and not weak else None
+    )
+    if encoding is None:
+        return response
+
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if etag:
+        # Same representation, different bytes: the validator becomes weak
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """Compress JSON/text responses according to Accept-Encoding"""
+    app.after_request(_after_request)
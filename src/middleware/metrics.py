@@ -0,0 +1,304 @@
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from src.models.models import db
+from src.models.password_hasher import password_hasher
+from src.database.pool import Histogram, pool_metrics
+from src.middleware.compression import compressor
+from src.database.jobs import job_queue
+from src.database.clicks import click_tracker
+from src.database.email_filter import email_filter
+import hmac
+import logging
+import os
+import threading
+import time
+
+slow_request_logger = logging.getLogger('src.slow_requests')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, float('inf'))
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, float('inf'))
+BCRYPT_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float('inf'))
+
+# Statements kept per request for the slow-request log
+MAX_RECORDED_STATEMENTS = 200
+SLOW_REQUEST_MS = float(os.getenv('SLOW_REQUEST_MS', '500'))
+# Scrapers send "Authorization: Bearer <METRICS_TOKEN>". Unset means loopback only,
+# so set it when a reverse proxy on the same host forwards public traffic
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# How long the jobs table counts are reused between scrapes
+JOB_METRICS_CACHE_SECONDS = float(os.getenv('JOB_METRICS_CACHE_SECONDS', '5'))
+
+
+class EndpointMetrics:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.db_time = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.response_size = Histogram(SIZE_BUCKETS)
+        self.bcrypt_time = Histogram(BCRYPT_BUCKETS)
+
+
+class RequestMetrics:
+    """Per-endpoint request metrics for this worker process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}  # (method, endpoint) -> EndpointMetrics
+        self.responses = {}  # (method, endpoint, status) -> count
+        self.bcrypt = Histogram(BCRYPT_BUCKETS)
+
+    def endpoint(self, method, endpoint):
+        key = (method, endpoint)
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            with self._lock:
+                metrics = self.endpoints.setdefault(key, EndpointMetrics())
+        return metrics
+
+    def count_response(self, method, endpoint, status):
+        key = (method, endpoint, status)
+        with self._lock:
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+
+request_metrics = RequestMetrics()
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def _render_histogram(lines, name, histogram, **labels):
+    snapshot = histogram.snapshot()
+    prefix = _labels(**labels)
+    prefix = prefix + ',' if prefix else ''
+    for bound, count in snapshot['buckets']:
+        lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {count}')
+    suffix = f'{{{_labels(**labels)}}}' if labels else ''
+    lines.append(f'{name}_sum{suffix} {snapshot["sum"]}')
+    lines.append(f'{name}_count{suffix} {snapshot["count"]}')
+
+
+def render_prometheus():
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    histograms = (
+        ('http_request_duration_seconds', 'latency', 'Request latency.'),
+        ('http_request_db_seconds', 'db_time', 'Time spent executing SQL per request.'),
+        ('http_request_db_statements', 'statements', 'SQL statements executed per request.'),
+        ('http_request_bcrypt_seconds', 'bcrypt_time', 'bcrypt time per request.'),
+        ('http_response_size_bytes', 'response_size', 'Response body size.'),
+    )
+    endpoints = sorted(request_metrics.endpoints.items())
+    for name, attribute, help_text in histograms:
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for (method, endpoint), metrics in endpoints:
+            _render_histogram(lines, name, getattr(metrics, attribute), method=method, endpoint=endpoint)
+
+    lines.append('# HELP http_responses_total Responses by status code.')
+    lines.append('# TYPE http_responses_total counter')
+    for (method, endpoint, status), count in sorted(request_metrics.responses.items()):
+        lines.append(f'http_responses_total{{{_labels(method=method, endpoint=endpoint, status=status)}}} {count}')
+
+    lines.append('# HELP password_hash_seconds Duration of each bcrypt hash/check.')
+    lines.append('# TYPE password_hash_seconds histogram')
+    _render_histogram(lines, 'password_hash_seconds', request_metrics.bcrypt)
+    lines.append('# HELP password_hash_rejected_total Hash requests rejected because the queue was full.')
+    lines.append('# TYPE password_hash_rejected_total counter')
+    lines.append(f'password_hash_rejected_total {password_hasher.rejected}')
+
+    lines.append('# HELP http_compression_seconds CPU time spent compressing a response body.')
+    lines.append('# TYPE http_compression_seconds histogram')
+    for encoding, stats in compressor.stats.items():
+        _render_histogram(lines, 'http_compression_seconds', stats.seconds, encoding=encoding)
+    for name, attribute, help_text in (
+        ('http_compressed_responses_total', 'responses', 'Responses sent compressed.'),
+        ('http_compression_cache_hits_total', 'cache_hits', 'Compressed bodies served from the cache.'),
+        ('http_compression_bytes_in_total', 'bytes_in', 'Body bytes before compression.'),
+        ('http_compression_bytes_out_total', 'bytes_out', 'Body bytes after compression.'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for encoding, stats in compressor.stats.items():
+            lines.append(f'{name}{{{_labels(encoding=encoding)}}} {getattr(stats, attribute)}')
+
+    depth, oldest_due = _job_queue_stats()
+    lines.append('# HELP jobs_queue_depth Jobs queued, running or failed.')
+    lines.append('# TYPE jobs_queue_depth gauge')
+    for (name, status), count in sorted(depth.items()):
+        lines.append(f'jobs_queue_depth{{{_labels(job=name, status=status)}}} {count}')
+    lines.append('# HELP jobs_oldest_due_seconds How long the oldest due job has been waiting.')
+    lines.append('# TYPE jobs_oldest_due_seconds gauge')
+    lines.append(f'jobs_oldest_due_seconds {oldest_due}')
+    for metric, attribute, help_text in (
+        ('job_wait_seconds', 'wait', 'Time from a job being due to a worker claiming it.'),
+        ('job_duration_seconds', 'duration', 'Job handler run time.'),
+    ):
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for name, histogram in sorted(getattr(job_queue.metrics, attribute).items()):
+            _render_histogram(lines, metric, histogram, job=name)
+    lines.append('# HELP jobs_total Job attempts by outcome (this process).')
+    lines.append('# TYPE jobs_total counter')
+    for (name, outcome), count in sorted(job_queue.metrics.outcomes.items()):
+        lines.append(f'jobs_total{{{_labels(job=name, outcome=outcome)}}} {count}')
+
+    lines.append('# HELP link_clicks_buffered Clicks waiting in this process for the next flush.')
+    lines.append('# TYPE link_clicks_buffered gauge')
+    lines.append(f'link_clicks_buffered {click_tracker.buffered}')
+    for name, attribute, help_text in (
+        ('link_clicks_recorded_total', 'recorded', 'Redirects counted.'),
+        ('link_clicks_flushed_total', 'flushed', 'Clicks written to link_clicks_daily.'),
+        ('link_clicks_dropped_total', 'dropped', 'Clicks lost to a full buffer.'),
+        ('link_click_flush_errors_total', 'flush_errors', 'Failed flushes (retried with the next one).'),
+    ):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        lines.append(f'{name} {getattr(click_tracker, attribute)}')
+    lines.append('# HELP link_click_flush_lag_seconds Age of the oldest click in each flush.')
+    lines.append('# TYPE link_click_flush_lag_seconds histogram')
+    _render_histogram(lines, 'link_click_flush_lag_seconds', click_tracker.flush_lag)
+    lines.append('# HELP link_click_flush_seconds Time spent writing a flush.')
+    lines.append('# TYPE link_click_flush_seconds histogram')
+    _render_histogram(lines, 'link_click_flush_seconds', click_tracker.flush_duration)
+
+    lines.append('# HELP email_filter_checks_total Email lookups by outcome (negative = answered without a query).')
+    lines.append('# TYPE email_filter_checks_total counter')
+    lines.append(f'email_filter_checks_total{{outcome="negative"}} {email_filter.negatives}')
+    lines.append(f'email_filter_checks_total{{outcome="positive"}} {email_filter.positives}')
+    lines.append('# HELP email_filter_ready Whether the email filter has been loaded in this process.')
+    lines.append('# TYPE email_filter_ready gauge')
+    lines.append(f'email_filter_ready {int(email_filter.ready)}')
+    lines.append('# HELP email_filter_rebuild_seconds Duration of the last email filter load.')
+    lines.append('# TYPE email_filter_rebuild_seconds gauge')
+    lines.append(f'email_filter_rebuild_seconds {email_filter.rebuild_seconds:.6f}')
+
+    pool = pool_metrics.snapshot(db.engine.pool)
+    lines.append('# HELP db_pool_checkout_wait_seconds Time waited for a pooled connection.')
+    lines.append('# TYPE db_pool_checkout_wait_seconds histogram')
+    _render_histogram(lines, 'db_pool_checkout_wait_seconds', pool_metrics.checkout_wait)
+    for name, kind in (('connections_created', 'counter'), ('connections_invalidated', 'counter'),
+                       ('checkout_timeouts', 'counter'), ('pool_size', 'gauge'),
+                       ('checked_out', 'gauge'), ('overflow', 'gauge')):
+        if name in pool:
+            metric = f'db_pool_{name}' + ('_total' if kind == 'counter' else '')
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.append(f'{metric} {pool[name]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    if has_request_context() and 'request_started' in g:
+        g.db_time += elapsed
+        g.db_statements += 1
+        if len(g.db_statement_log) < MAX_RECORDED_STATEMENTS:
+            g.db_statement_log.append((statement, elapsed))
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def _observe_bcrypt(elapsed):
+    request_metrics.bcrypt.observe(elapsed)
+    if has_request_context() and 'request_started' in g:
+        g.bcrypt_time += elapsed
+
+
+def _before_request():
+    g.request_started = time.perf_counter()
+    g.db_time = 0.0
+    g.db_statements = 0
+    g.db_statement_log = []
+    g.bcrypt_time = 0.0
+
+
+def _after_request(response):
+    if 'request_started' not in g:
+        return response
+
+    elapsed = time.perf_counter() - g.request_started
+    endpoint = request.endpoint or 'unmatched'
+    metrics = request_metrics.endpoint(request.method, endpoint)
+    metrics.latency.observe(elapsed)
+    metrics.db_time.observe(g.db_time)
+    metrics.statements.observe(g.db_statements)
+    metrics.bcrypt_time.observe(g.bcrypt_time)
+    if not response.is_streamed and response.content_length is not None:
+        metrics.response_size.observe(response.content_length)
+    request_metrics.count_response(request.method, endpoint, response.status_code)
+
+    if elapsed * 1000 >= SLOW_REQUEST_MS:
+        slow_request_logger.warning(
+            "Slow request %s %s: %.1fms, %d statements (%.1fms), bcrypt %.1fms\n%s",
+            request.method, request.path, elapsed * 1000,
+            g.db_statements, g.db_time * 1000, g.bcrypt_time * 1000,
+            '\n'.join(f'  [{duration * 1000:.1f}ms] {statement}' for statement, duration in g.db_statement_log)
+        )
+    return response
+
+
+_job_stats = None
+_job_stats_at = 0.0
+_job_stats_lock = threading.Lock()
+
+
+def _job_queue_stats():
+    """(depth, oldest_due) for the jobs table, queried at most every JOB_METRICS_CACHE_SECONDS"""
+    global _job_stats, _job_stats_at
+    with _job_stats_lock:
+        if _job_stats is not None and time.monotonic() - _job_stats_at < JOB_METRICS_CACHE_SECONDS:
+            return _job_stats
+        try:
+            _job_stats = (job_queue.depth(), job_queue.oldest_due_age())
+        except Exception as e:  # e.g. jobs table not migrated yet
+            print(f"Job metrics error: {e}")
+            db.session.rollback()
+            _job_stats = ({}, 0.0)
+        _job_stats_at = time.monotonic()
+        return _job_stats
+
+
+def _metrics_allowed():
+    """Bearer METRICS_TOKEN when configured, otherwise only local scrapes"""
+    if METRICS_TOKEN:
+        auth_header = request.headers.get('Authorization', '')
+        return hmac.compare_digest(auth_header.encode(), f'Bearer {METRICS_TOKEN}'.encode())
+    return request.remote_addr in ('127.0.0.1', '::1')
+
+
+_engine_events_registered = False
+
+
+def init_metrics(app):
+    """Register request timing hooks, SQL/bcrypt instrumentation and /metrics"""
+    global _engine_events_registered
+    if not _engine_events_registered:
+        # Listening on the Engine class covers every engine (and replica) we create
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _engine_events_registered = True
+    password_hasher.observer = _observe_bcrypt
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        # Pool, replica and queue internals are admin-only at /api/admin/db-pool too
+        if not _metrics_allowed():
+            return Response('Not found\n', status=404, mimetype='text/plain')
+        return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,191 @@
+from flask import request, jsonify
+from functools import wraps
+from collections import OrderedDict
+import math
+import os
+import threading
+import time
+
+
+class MemoryBackend:
+    """Token buckets for this worker process
+
+    Each bucket is a (tokens, updated_at) pair refilled lazily on access, so
+    a take() is O(1). At most `maxsize` buckets are kept; the least recently
+    used (idle) ones are evicted first, which only ever resets them to full.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize if maxsize is not None else int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+
+    def take(self, key, rate, burst, cost=1):
+        """Return (allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# KEYS[1] bucket; ARGV rate (tokens/s), burst, cost. Uses the Redis clock so
+# every worker sees the same time.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared by every worker, updated atomically in Redis
+
+    Idle buckets expire once they would be full again, so memory stays
+    bounded by the number of active keys. If Redis is unreachable requests
+    are let through rather than locking everyone out.
+    """
+
+    def __init__(self, url, prefix='ratelimit:'):
+        import redis  # optional dependency, only needed for a shared backend
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self._script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, key, rate, burst, cost=1):
+        try:
+            retry_after = float(self._script(keys=[self.prefix + key], args=[rate, burst, cost]))
+        except Exception as e:
+            print(f"Rate limit backend error: {e}")
+            return True, 0.0
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}*'):
+            self.client.delete(key)
+
+
+def backend_from_env():
+    """RATE_LIMIT_STORAGE_URL=redis://... shares limits across workers"""
+    url = os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+    if url.startswith('memory://'):
+        return MemoryBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend(url)
+    raise ValueError(f"Unsupported RATE_LIMIT_STORAGE_URL: {url}")
+
+
+class Limit:
+    """`burst` requests per `period` seconds for each value of `key_func`
+
+    Spec strings look like "5/60" (5 requests, refilled over 60 seconds).
+    """
+
+    def __init__(self, name, spec, key_func):
+        count, period = spec.split('/')
+        self.name = name
+        self.burst = float(count)
+        self.rate = self.burst / float(period)
+        self.key_func = key_func
+
+
+def client_ip():
+    # Behind a proxy, wrap the app in werkzeug's ProxyFix so this is the client
+    return request.remote_addr or 'unknown'
+
+
+def json_email():
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    return email.strip().lower() if isinstance(email, str) and email.strip() else None
+
+
+class RateLimiter:
+    def __init__(self, backend=None, enabled=None):
+        self._backend = backend
+        self.enabled = enabled if enabled is not None else (
+            os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+        )
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = backend_from_env()
+        return self._backend
+
+    def check(self, limits):
+        """Take a token from each matching bucket, return the longest wait (0 if allowed)"""
+        retry_after = 0.0
+        for limit in limits:
+            value = limit.key_func()
+            if value is None:
+                continue
+            allowed, wait = self.backend.take(f'{limit.name}:{value}', limit.rate, limit.burst)
+            if not allowed:
+                retry_after = max(retry_after, wait)
+        return retry_after
+
+    def limit(self, *limits):
+        """Decorator rejecting requests over any of `limits` with 429
+
+        Runs before the view, so rejected requests do no database or bcrypt work.
+        The limits are kept on the view as `rate_limits` for the ASGI app's
+        native routes.
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if self.enabled:
+                    retry_after = self.check(limits)
+                    if retry_after:
+                        response = jsonify({'error': 'Too many requests, try again later'})
+                        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                        return response, 429
+                return f(*args, **kwargs)
+            decorated.rate_limits = limits
+            return decorated
+        return decorator
+
+
+rate_limiter = RateLimiter()
+
+LOGIN_LIMITS = (
+    Limit('login-ip', os.getenv('RATE_LIMIT_LOGIN_IP', '20/60'), client_ip),
+    Limit('login-email', os.getenv('RATE_LIMIT_LOGIN_EMAIL', '5/60'), json_email),
+)
+SIGNUP_LIMITS = (
+    Limit('signup-ip', os.getenv('RATE_LIMIT_SIGNUP_IP', '10/3600'), client_ip),
+    Limit('signup-email', os.getenv('RATE_LIMIT_SIGNUP_EMAIL', '3/3600'), json_email),
+)
+EMAIL_CHECK_LIMITS = (
+    Limit('email-check-ip', os.getenv('RATE_LIMIT_EMAIL_CHECK_IP', '30/60'), client_ip),
+)
@@ -2,6 +2,32 @@ from flask import request, jsonify
 import time
 from functools import wraps
 
+# Enough to fix a request; a payload with thousands of bad items gets no more
+MAX_REPORTED_ERRORS = 20
+
+
+def parse_json(model):
+    """Validate the raw request body with a pydantic model
+
+    model_validate_json parses and validates in one pass inside pydantic-core,
+    without building an intermediate dict first. Malformed or missing JSON
+    raises a ValidationError like any other bad input.
+    """
+    return model.model_validate_json(request.get_data(cache=True))
+
+
+def validation_error(e):
+    """400 response for a pydantic ValidationError
+
+    Leaves out the offending input (which can be arbitrarily large) and caps
+    the number of errors reported.
+    """
+    return jsonify({
+        "error": "Validation failed",
+        "details": e.errors(include_url=False, include_context=False, include_input=False)[:MAX_REPORTED_ERRORS]
+    }), 400
+
+
 def validate_json(f):
     """Middleware to ensure request contains valid JSON"""
     @wraps(f)
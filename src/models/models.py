@@ -3,16 +3,25 @@ from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
-import bcrypt
 import jwt
 import os
 from datetime import timedelta
+from src.models.password_hasher import password_hasher
+from src.database.replicas import RoutingSession
 
 
-db = SQLAlchemy()
+# Reads of GET requests may be routed to a replica (src/database/replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
+
+    # Keyset pagination for the user listing walks (created_at, id)
+    __table_args__ = (
+        db.Index('ix_users_created_at_id', 'created_at', 'id'),
+    )
+
+    TOKEN_LIFETIME = timedelta(hours=24)
     
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)    
     firstName = db.Column(db.String(100), nullable=True)
@@ -20,27 +29,34 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password = db.Column(db.String(255), nullable=False)
     image = db.Column(db.String(255), nullable=True)
-    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     is_admin = db.Column(db.Boolean, default=False, nullable=False)
-    # Relationship to user links
-    user_links = db.relationship('UserLink', backref='user_link_user', lazy=True)
+    # Bumped to revoke every token issued so far (tokens carry it as `ver`)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Relationship to user links - loaded on first access. Queries that
+    # serialize a profile add selectinload(User.user_links): one extra SELECT
+    # for all the links, however many there are
+    user_links = db.relationship(
+        'UserLink',
+        backref='user_link_user',
+        order_by='UserLink.position'
+    )
 
     def __repr__(self):
         return f'<User {self.email}>'
     
     def set_password(self, password):
         """Hash and set the password"""
-        password_bytes = password.encode('utf-8')
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password_bytes, salt)
-        self.password = hashed.decode('utf-8')
+        self.password = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check if the provided password matches the hashed password"""
-        password_bytes = password.encode('utf-8')
-        hashed_bytes = self.password.encode('utf-8')
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        return password_hasher.check(password, self.password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash uses an outdated bcrypt cost factor"""
+        return password_hasher.needs_rehash(self.password)
     
     def generate_token(self):
         """Generate JWT token for the user"""
@@ -49,11 +65,16 @@ class User(db.Model):
             'user_id': str(self.id),
             'email': self.email,
             'is_admin': self.is_admin,  # Include admin status in token
-            'exp': datetime.now(timezone.utc) + timedelta(hours=24),  # Token expires in 24 hours
+            'ver': self.token_version or 0,
+            'exp': datetime.now(timezone.utc) + self.TOKEN_LIFETIME,  # Token expires in 24 hours
             'iat': datetime.now(timezone.utc)
         }
         return jwt.encode(payload, secret_key, algorithm='HS256')
     
+    def revoke_tokens(self):
+        """Invalidate every token issued to this user so far (takes effect on commit)"""
+        self.token_version = (self.token_version or 0) + 1
+
     @staticmethod
     def verify_token(token):
         """Verify JWT token and return user data"""
@@ -79,6 +100,27 @@ class User(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+    def to_public_dict(self):
+        """Profile as shown to anonymous visitors - no email or account details"""
+        return {
+            'id': str(self.id),
+            'firstName': self.firstName,
+            'lastName': self.lastName,
+            'image': self.image,
+            'links': [
+                {
+                    'id': str(link.id),
+                    'url': link.url,
+                    'platform': link.platform_dict()
+                }
+                for link in self.user_links
+            ],
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+# Login looks users up by lower(email)
+db.Index('ix_users_email_lower', db.func.lower(User.email), unique=True)
+
 class Platform(db.Model):
     __tablename__ = 'platforms'
     
@@ -88,7 +130,8 @@ class Platform(db.Model):
     darkIcon = db.Column(db.String(255), nullable=False)
     previewColor = db.Column(db.String(50), nullable=False)
     
-    # Relationship to user links
+    # Relationship to user links - link.to_dict() reads platforms from the
+    # in-process catalog cache, so the platform row is only loaded on a miss
     user_links = db.relationship('UserLink', backref='user_link_platform', lazy=True)
     
     def __repr__(self):
@@ -106,14 +149,85 @@ class Platform(db.Model):
 class UserLink(db.Model):
     __tablename__ = 'user_links'
 
+    __table_args__ = (
+        # Links are always read per user in display order; the INCLUDE columns
+        # let Postgres answer that with an index-only scan
+        db.Index('ix_user_links_user_id_position', 'user_id', 'position',
+                 postgresql_include=['id', 'platform_id', 'url', 'created_at']),
+        # Foreign key checks when a platform is deleted
+        db.Index('ix_user_links_platform_id', 'platform_id'),
+    )
+
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = db.Column(UUID(as_uuid=True), db.ForeignKey('users.id'), nullable=False)
     platform_id = db.Column(UUID(as_uuid=True), db.ForeignKey('platforms.id'), nullable=False)
     url = db.Column(db.String(500), nullable=False)
+    # Display order within the user's profile - reordering only updates this column
+    position = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     
     def __repr__(self):
         return f'<UserLink user={self.user_id} platform={self.platform_id}>'
+
+    @classmethod
+    def sync_for_user(cls, user, links):
+        """Make the user's links match `links` with the fewest writes
+
+        `links` is an ordered list of {"platform_id": UUID, "url": str}. Existing
+        rows are matched by platform (preferring the same URL), so unchanged links
+        are left alone, edited or moved links get a single bulk UPDATE and only
+        new/removed links are inserted/deleted. Returns (inserted, updated, deleted).
+        """
+        # Lock the user row so concurrent saves for the same user run one after
+        # the other, then diff against the links as they are now
+        db.session.execute(db.select(User.id).where(User.id == user.id).with_for_update())
+        current = db.session.execute(
+            db.select(cls)
+            .where(cls.user_id == user.id)
+            .order_by(cls.position)
+            .execution_options(populate_existing=True)
+        ).scalars().all()
+
+        # Existing rows by platform, in their current order
+        existing = {}
+        for link in current:
+            existing.setdefault(link.platform_id, []).append(link)
+
+        inserts = []
+        updates = []
+        for position, link_data in enumerate(links):
+            candidates = existing.get(link_data['platform_id'])
+            if not candidates:
+                inserts.append({
+                    'user_id': user.id,
+                    'platform_id': link_data['platform_id'],
+                    'url': link_data['url'],
+                    'position': position
+                })
+                continue
+
+            match = next((l for l in candidates if l.url == link_data['url']), candidates[0])
+            candidates.remove(match)
+            if match.url != link_data['url'] or match.position != position:
+                updates.append({'id': match.id, 'url': link_data['url'], 'position': position})
+
+        deletes = [link.id for candidates in existing.values() for link in candidates]
+
+        if deletes:
+            db.session.execute(
+                db.delete(cls).where(cls.id.in_(deletes)),
+                execution_options={'synchronize_session': False}
+            )
+        if updates:
+            db.session.execute(db.update(cls), updates)
+        if inserts:
+            db.session.execute(db.insert(cls), inserts)
+
+        # The loaded collection no longer matches the table
+        if deletes or updates or inserts:
+            db.session.expire(user, ['user_links'])
+
+        return len(inserts), len(updates), len(deletes)
     
     def to_dict(self):
         return {
@@ -122,5 +236,81 @@ class UserLink(db.Model):
             'platform_id': str(self.platform_id),
             'url': self.url,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'platform': self.user_link_platform.to_dict() if self.user_link_platform else None
-        }
\ No newline at end of file
+            'platform': self.platform_dict()
+        }
+
+    def platform_dict(self):
+        """Serialized platform, served from the catalog cache when possible"""
+        from src.database.platform_cache import platform_catalog
+
+        platform = platform_catalog.get(self.platform_id)
+        if platform is None and self.user_link_platform:
+            # Not in this process's catalog yet (e.g. added by another worker)
+            platform = self.user_link_platform.to_dict()
+        return platform
+
+class Job(db.Model):
+    """A background job - rows are the durable queue (src/database/jobs.py)"""
+    __tablename__ = 'jobs'
+
+    # Workers claim due jobs by (status, run_at); finished rows are not indexed
+    __table_args__ = (
+        db.Index('ix_jobs_due', 'status', 'run_at',
+                 postgresql_where=db.text("status IN ('queued', 'running')")),
+    )
+
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued | running | done | failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    # Naive UTC, like the comparisons the worker makes
+    run_at = db.Column(db.DateTime, nullable=False)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<Job {self.name} {self.status}>'
+
+
+class LinkClickDaily(db.Model):
+    """Clicks per link per UTC day, upserted in batches by src/database/clicks.py"""
+    __tablename__ = 'link_clicks_daily'
+
+    # Per-user stats read a date range of all the user's links
+    __table_args__ = (
+        db.Index('ix_link_clicks_daily_user_id_day', 'user_id', 'day'),
+    )
+
+    # No foreign keys: a batch holding a click on a link deleted since must not
+    # fail the whole flush
+    link_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(UUID(as_uuid=True), nullable=False)
+    clicks = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<LinkClickDaily {self.link_id} {self.day}: {self.clicks}>'
+
+
+class LinkHealth(db.Model):
+    """Last result of checking a link's URL (src/database/link_checker.py)"""
+    __tablename__ = 'link_health'
+
+    # Like link_clicks_daily, no foreign key: results for a link deleted while
+    # its batch was being checked must not fail the bulk upsert
+    link_id = db.Column(UUID(as_uuid=True), primary_key=True)
+    # The URL that was checked - the result is stale once the link's url differs
+    url = db.Column(db.String(500), nullable=False)
+    ok = db.Column(db.Boolean, nullable=False)
+    status_code = db.Column(db.Integer, nullable=True)
+    error = db.Column(db.String(200), nullable=True)
+    latency_ms = db.Column(db.Integer, nullable=True)
+    consecutive_failures = db.Column(db.Integer, nullable=False, default=0)
+    checked_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<LinkHealth {self.link_id} {self.status_code or self.error}>'
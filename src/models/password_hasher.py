@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+import bcrypt
+
+MAX_PASSWORD_BYTES = 72  # bcrypt refuses longer passwords
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full - callers should answer 503"""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing queue is full")
+        self.retry_after = retry_after
+
+
+def default_workers():
+    """bcrypt threads per process when PASSWORD_HASH_WORKERS isn't set
+
+    Every web worker process has its own pool, so up to
+    workers x WEB_CONCURRENCY hashes run at once. bcrypt is pure CPU: past
+    one hash per core they only slow each other (and every other request)
+    down, so the cores are split across the processes - WEB_CONCURRENCY
+    defaults to gunicorn.conf.py's 2 x CPUs + 1, i.e. one thread each.
+    """
+    cpus = os.cpu_count() or 2
+    processes = int(os.getenv('WEB_CONCURRENCY', str(cpus * 2 + 1)))
+    return max(1, cpus // max(1, processes))
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated, size-limited thread pool
+
+    At most `workers` hashes run at once and at most `max_queue` more may wait.
+    Anything beyond that is rejected immediately with PasswordHasherBusy, so a
+    login storm can't tie up every request thread behind bcrypt. Size
+    PASSWORD_HASH_WORKERS so that it times the number of processes stays at
+    about the CPU count (see default_workers).
+    """
+
+    def __init__(self, workers=None, max_queue=None, rounds=None, retry_after=None):
+        self.workers = workers or int(os.getenv('PASSWORD_HASH_WORKERS', '0')) or default_workers()
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv('PASSWORD_HASH_QUEUE', '32'))
+        self.rounds = rounds or int(os.getenv('BCRYPT_ROUNDS', '12'))
+        self.retry_after = retry_after or int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '1'))
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self.rejected = 0
+        # Optional callable(seconds) told how long each bcrypt call ran
+        self.observer = None
+
+    def _get_executor(self):
+        # Created on first use so the pool's threads are never inherited by a fork
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='bcrypt'
+                    )
+        return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        result, elapsed = future.result()
+        if self.observer:
+            self.observer(elapsed)
+        return result
+
+    def hash(self, password):
+        """Return the bcrypt hash of `password` using the configured cost"""
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), salt)
+        return hashed.decode('utf-8')
+
+    def check(self, password, hashed):
+        """Check `password` against a stored bcrypt hash
+
+        bcrypt raises on passwords over 72 bytes, and hash() never stored
+        one, so a longer password simply doesn't match.
+        """
+        password = password.encode('utf-8')
+        if len(password) > MAX_PASSWORD_BYTES:
+            return False
+        return self._run(bcrypt.checkpw, password, hashed.encode('utf-8'))
+
+    def needs_rehash(self, hashed):
+        """True if `hashed` was made with a different cost than the configured one"""
+        try:
+            # $2b$<cost>$<salt+hash>
+            return int(hashed.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,57 @@
+from pydantic import BaseModel, EmailStr, Field, StringConstraints, AfterValidator, BeforeValidator
+from pydantic_core import PydanticCustomError
+from typing import Annotated, List, Optional
+import os
+import uuid
+from src.models.password_hasher import MAX_PASSWORD_BYTES
+
+# Request bodies of the auth routes, also used to validate bulk import rows.
+# Bounds follow the column sizes, so anything that validates also fits the row
+MAX_LINKS = int(os.getenv('PROFILE_MAX_LINKS', '50'))
+
+def max_length(limit):
+    """Reject an over-long string before the type's own (costlier) validation runs"""
+    def check(value):
+        if isinstance(value, str) and len(value) > limit:
+            raise PydanticCustomError(
+                'string_too_long', 'String should have at most {max_length} characters', {'max_length': limit}
+            )
+        return value
+    return BeforeValidator(check)
+
+def check_password_bytes(value):
+    if len(value.encode('utf-8')) > MAX_PASSWORD_BYTES:
+        raise ValueError(f"Password must be at most {MAX_PASSWORD_BYTES} bytes")
+    return value
+
+# Stored and compared lowercased; ix_users_email_lower keeps them unique
+Email = Annotated[EmailStr, max_length(120), AfterValidator(str.lower)]
+# Only checked against stored hashes: one over 72 bytes is a wrong password, not an error
+Password = Annotated[str, StringConstraints(max_length=1024)]
+NewPassword = Annotated[str, StringConstraints(min_length=1), max_length(MAX_PASSWORD_BYTES), AfterValidator(check_password_bytes)]
+Name = Annotated[str, StringConstraints(max_length=100)]
+
+class Signup(BaseModel):
+    email: Email
+    password: NewPassword
+
+class EmailAvailable(BaseModel):
+    email: Email
+
+class Login(BaseModel):
+    email: Email
+    password: Password
+
+class ChangePassword(BaseModel):
+    oldPassword: Password
+    newPassword: NewPassword
+
+class LinkInput(BaseModel):
+    platform_id: uuid.UUID
+    url: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=500)]
+
+class UpdateProfile(BaseModel):
+    firstName: Optional[Name] = None
+    lastName: Optional[Name] = None
+    image: Optional[Annotated[str, StringConstraints(max_length=255)]] = None
+    links: Optional[Annotated[List[LinkInput], Field(max_length=MAX_LINKS)]] = None
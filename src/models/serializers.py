@@ -0,0 +1,150 @@
+from datetime import date
+from decimal import Decimal
+from flask.json.provider import DefaultJSONProvider
+import json
+import uuid
+from src.database.image_store import image_url
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to the stdlib encoder
+    orjson = None
+
+
+def _default(value):
+    """Types neither encoder handles natively"""
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(data):
+    """Serialize to UTF-8 JSON bytes - orjson when installed (UUID/datetime natively)"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider writing the same output as dumps_json()
+
+    UUIDs and datetimes are encoded as strings/ISO 8601 (the stdlib provider
+    would turn datetimes into HTTP dates), and with orjson installed jsonify()
+    skips the stdlib encoder entirely.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps_json(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        data = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_json(data), mimetype=self.mimetype)
+
+
+class Field:
+    """Copy an attribute as-is (UUIDs and datetimes are left to the encoder)"""
+
+    def __init__(self, name, attribute=None):
+        self.name = name
+        self.attribute = attribute or name
+
+
+class Method:
+    """Value computed by `fn(obj)`"""
+
+    def __init__(self, name, fn):
+        self.name = name
+        self.fn = fn
+
+
+class Nested:
+    """Serialize an attribute (or each item of it, with many=True) with another schema"""
+
+    def __init__(self, name, attribute, schema, many=False):
+        self.name = name
+        self.attribute = attribute
+        self.schema = schema
+        self.many = many
+
+
+class Schema:
+    """Declared response shape, compiled once into a plain function
+
+    The generated function is a single dict literal of attribute reads, so it
+    works the same on ORM objects and on `Row` tuples from projected queries.
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self.dump = self._compile()
+
+    def _compile(self):
+        namespace = {}
+        entries = []
+        for i, field in enumerate(self.fields):
+            if isinstance(field, Nested):
+                namespace[f'_nested{i}'] = field.schema
+                if field.many:
+                    expr = f'[_nested{i}.dump(item) for item in obj.{field.attribute}]'
+                else:
+                    expr = (f'_nested{i}.dump(obj.{field.attribute}) '
+                            f'if obj.{field.attribute} is not None else None')
+            elif isinstance(field, Method):
+                namespace[f'_method{i}'] = field.fn
+                expr = f'_method{i}(obj)'
+            else:
+                expr = f'obj.{field.attribute}'
+            entries.append(f'        {field.name!r}: {expr},')
+
+        source = 'def dump(obj):\n    return {\n' + '\n'.join(entries) + '\n    }\n'
+        exec(compile(source, f'<schema {id(self):x}>', 'exec'), namespace)
+        return namespace['dump']
+
+    def dump_many(self, objs):
+        dump = self.dump
+        return [dump(obj) for obj in objs]
+
+    def dumps(self, obj):
+        """Serialize straight to JSON bytes"""
+        return dumps_json(self.dump(obj))
+
+
+PLATFORM_SCHEMA = Schema(
+    Field('id'), Field('name'), Field('lightIcon'), Field('darkIcon'), Field('previewColor')
+)
+
+USER_LINK_SCHEMA = Schema(
+    Field('id'), Field('user_id'), Field('platform_id'), Field('url'), Field('created_at'),
+    Method('platform', lambda link: link.platform_dict())
+)
+
+USER_SCHEMA = Schema(
+    Field('id'), Field('firstName'), Field('lastName'), Field('email'),
+    Method('image', lambda user: image_url(user.image)),
+    Field('is_admin'),
+    Nested('links', 'user_links', USER_LINK_SCHEMA, many=True),
+    Field('created_at'), Field('updated_at')
+)
+
+PUBLIC_LINK_SCHEMA = Schema(
+    Field('id'), Field('url'),
+    Method('platform', lambda link: link.platform_dict())
+)
+
+PUBLIC_USER_SCHEMA = Schema(
+    Field('id'), Field('firstName'), Field('lastName'),
+    Method('image', lambda user: image_url(user.image)),
+    Nested('links', 'user_links', PUBLIC_LINK_SCHEMA, many=True),
+    Field('updated_at')
+)
@@ -1,4 +1,16 @@
-from flask import Blueprint
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
+from werkzeug.exceptions import RequestEntityTooLarge
+from src.models.models import Job, db
+from src.middleware.auth import admin_required
+from src.middleware.body_limit import body_limit
+from src.database.pool import pool_metrics
+from src.database.replicas import replica_router
+from src.database.bulk import read_rows, import_users, export_ndjson, ImportResult, IMPORT_DIR, MAX_IMPORT_BYTES
+from src.database.jobs import job_queue
+import os
+import shutil
+import tempfile
+import uuid
 
 admin_blueprint = Blueprint("admin", __name__)
 
@@ -8,4 +20,115 @@ def login():
 
 @admin_blueprint.route("/reset-password", methods=['POST'])
 def resetPassword():
-    return "Reset admin Password"
\ No newline at end of file
+    return "Reset admin Password"
+
+@admin_blueprint.route("/db-pool", methods=['GET'])
+@admin_required(stateless=True)
+def dbPoolMetrics(current_user):
+    """Connection pool usage for this worker process"""
+    return jsonify({
+        "pool": pool_metrics.snapshot(db.engine.pool),
+        "replicas": replica_router.snapshot()
+    }), 200
+
+
+@job_queue.task('import_users', max_attempts=3)
+def import_users_job(path, fmt, result=None):
+    """Background job: import an uploaded file, then delete it
+
+    The counts go into the job's payload (committed even when the import
+    fails part way), which GET /api/admin/users/import/<job_id> reports;
+    a retry replaces the `result` of the attempt before it. Emails imported
+    by an earlier attempt count as existing.
+    """
+    job = job_queue.current_job()
+    result_counts = ImportResult()
+    finished = False
+    try:
+        with open(path, encoding='utf-8', newline='') as f:
+            import_users(read_rows(f, fmt), result=result_counts)
+        finished = True
+    finally:
+        db.session.rollback()
+        if job is not None:
+            job.payload = dict(job.payload, result=result_counts.to_dict())
+            db.session.commit()
+        if finished or job_queue.final_attempt():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def import_status(job):
+    return {
+        "job": str(job.id),
+        "status": job.status,
+        "attempts": job.attempts,
+        "error": job.last_error,
+        "result": job.payload.get('result')
+    }
+
+
+@admin_blueprint.route("/users/import", methods=['POST'])
+@body_limit(MAX_IMPORT_BYTES)
+@admin_required(stateless=True)
+def importUsers(current_user):
+    """Bulk import users from an NDJSON (default) or CSV request body
+
+    The body is streamed to a file under BULK_IMPORT_DIR and imported by an
+    `import_users` background job - bcrypt at tens of thousands of rows
+    would outlast any request timeout. Returns 202 with the URL to poll.
+    """
+    fmt = 'csv' if request.mimetype == 'text/csv' else 'ndjson'
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=IMPORT_DIR, prefix='import-', suffix=f'.{fmt}')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            shutil.copyfileobj(request.stream, f, 1024 * 1024)
+        job = job_queue.enqueue('import_users', path=path, fmt=fmt)
+        db.session.commit()
+    except RequestEntityTooLarge:
+        os.remove(path)
+        return jsonify({
+            "error": f"Request body is larger than {MAX_IMPORT_BYTES} bytes"
+        }), 413
+    except Exception as e:
+        db.session.rollback()
+        os.remove(path)
+        print(f"Bulk import upload error: {e}")
+        return jsonify({
+            "error": "Import failed"
+        }), 500
+
+    status_url = url_for('admin.importStatus', job_id=job.id)
+    return jsonify({
+        "message": "Import queued",
+        "statusUrl": status_url,
+        "import": import_status(job)
+    }), 202, {"Location": status_url}
+
+@admin_blueprint.route("/users/import/<job_id>", methods=['GET'])
+@admin_required(stateless=True)
+def importStatus(current_user, job_id):
+    """Progress of a bulk import job"""
+    try:
+        job_uuid = uuid.UUID(job_id)
+    except ValueError:
+        return jsonify({"error": "Import not found"}), 404
+
+    # The job row is written by workers - read it from the primary
+    with replica_router.primary():
+        job = db.session.get(Job, job_uuid)
+    if job is None or job.name != 'import_users':
+        return jsonify({"error": "Import not found"}), 404
+    return jsonify(import_status(job)), 200
+
+@admin_blueprint.route("/users/export", methods=['GET'])
+@admin_required(stateless=True)
+def exportUsers(current_user):
+    """Stream every user with their links as NDJSON"""
+    return Response(
+        stream_with_context(export_ndjson()),
+        mimetype='application/x-ndjson'
+    )
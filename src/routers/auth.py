@@ -1,39 +1,42 @@
 from flask import Blueprint, request, jsonify
-from pydantic import BaseModel, ValidationError, EmailStr
-from src.models.models import User, db, UserLink
-from src.middleware.auth import jwt_required
+from pydantic import ValidationError
+from src.models.models import User, db, UserLink, LinkClickDaily
+from src.models.password_hasher import PasswordHasherBusy, password_hasher
+from src.models.serializers import USER_SCHEMA
+from src.models.schemas import Signup, EmailAvailable, Login, ChangePassword, UpdateProfile
+from src.middleware.auth import jwt_required, token_cache
+from src.middleware.utils import parse_json, validation_error
+from src.middleware.rate_limit import rate_limiter, LOGIN_LIMITS, SIGNUP_LIMITS, EMAIL_CHECK_LIMITS
+from src.database.profile_cache import public_profile_cache
+from src.database.replicas import replica_router
+from src.database.clicks import link_index
+from src.database.email_filter import email_filter
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from datetime import datetime, timedelta, timezone
 
 auth_blueprint = Blueprint('auth', __name__)
 
-class Signup(BaseModel):
-    email: EmailStr
-    password: str
-
-class Login(BaseModel):
-    email: EmailStr
-    password: str
-
-class ChangePassword(BaseModel):
-    oldPassword: str
-    newPassword: str
-
-class UpdateProfile(BaseModel):
-    firstName: str = None
-    lastName: str = None
-    image: str = None
-    links: list = None  # List of {"platform_id": "uuid", "url": "string"}
+def hashing_busy(e):
+    """503 response for when the password hashing pool is saturated"""
+    response = jsonify({
+        "error": "Server is busy, please try again shortly"
+    })
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response, 503
 
 @auth_blueprint.route("/login", methods=['POST'])
+@rate_limiter.limit(*LOGIN_LIMITS)
 def login():
     try:
-        # Get JSON data from request body
-        data = request.get_json()
+        # Parse and validate the raw body in one pass
+        login_data = parse_json(Login)
         
-        # Validate data using Pydantic model
-        login_data = Login(**data)
-        
-        # Find user by email
-        user = User.query.filter_by(email=login_data.email).first()
+        # Find user by email (already lowercased), through ix_users_email_lower
+        user = User.query.filter(
+            db.func.lower(User.email) == login_data.email
+        ).options(selectinload(User.user_links)).first()
         
         if not user:
             return jsonify({
@@ -46,84 +49,129 @@ def login():
                 "error": "Invalid email or password"
             }), 401
         
+        # Transparently upgrade hashes made with an outdated cost factor; the
+        # password is already verified, so a busy hashing pool only defers it
+        if user.password_needs_rehash():
+            try:
+                user.set_password(login_data.password)
+                db.session.commit()
+            except PasswordHasherBusy:
+                db.session.rollback()
+        
         # Generate JWT token
         token = user.generate_token()
         
         return jsonify({
             "message": "Login successful",
             "token": token,
-            "user": user.to_dict()
+            "user": USER_SCHEMA.dump(user)
         }), 200
         
     except ValidationError as e:
-        return jsonify({
-            "error": "Validation failed",
-            "details": e.errors()
-        }), 400
+        return validation_error(e)
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return hashing_busy(e)
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({
             "error": "Login failed"
         }), 500
 
+def _email_registered(email):
+    """Exact match, the same test the unique constraint on users.email applies"""
+    return db.session.execute(
+        db.select(User.id).where(User.email == email).limit(1)
+    ).first() is not None
+
+def _insert_user(email, password_hash):
+    """INSERT ... ON CONFLICT (email) DO NOTHING RETURNING, None if the email is taken"""
+    dialect = db.session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+    stmt = (
+        insert(User.__table__)
+        .values(email=email, password=password_hash)
+        .on_conflict_do_nothing(index_elements=['email'])
+        .returning(*User.__table__.c)
+    )
+    row = db.session.execute(stmt).first()
+    if row is None:
+        return None
+    user = User(**row._mapping)
+    # A new account has no links - don't load them
+    set_committed_value(user, 'user_links', [])
+    return user
+
 @auth_blueprint.route("/signup", methods=['POST'])
+@rate_limiter.limit(*SIGNUP_LIMITS)
 def signup():
     try:
-        # Get JSON data from request body
-        data = request.get_json()
-        
-        # Validate data using Pydantic model
-        user_data = Signup(**data)
-        
-        # Check if user already exists - Look how simple this is now!
-        try:
-            existing_user = User.query.filter_by(email=user_data.email).first()
-            print(f"Database query result: {existing_user}")  # Debug log
-        except Exception as db_error:
-            print(f"Database error: {db_error}")  # Debug log
-            return jsonify({
-                "error": "Database connection error"
-            }), 500
+        # Parse and validate the raw body in one pass
+        user_data = parse_json(Signup)
         
-        if existing_user:
+        # Turn known accounts away before paying for bcrypt; emails the filter
+        # has never seen skip this query
+        if email_filter.might_contain(user_data.email) and _email_registered(user_data.email):
             return jsonify({
                 "error": "User with this email already exists"
             }), 409
         
-        # Create new user - Also super simple!
-        try:
-            new_user = User(
-                email=user_data.email
-            )
-            # Hash the password before storing
-            new_user.set_password(user_data.password)
-            
-            db.session.add(new_user)
-            db.session.commit()
-            
-            return jsonify({
-                "message": "User registered successfully",
-                "user": new_user.to_dict()
-            }), 201
-            
-        except Exception as e:
+        password_hash = password_hasher.hash(user_data.password)
+        
+        # One round trip - a concurrent signup with the same email loses here
+        new_user = _insert_user(user_data.email, password_hash)
+        if new_user is None:
             db.session.rollback()
-            print(f"Error creating user: {e}")
             return jsonify({
-                "error": "Failed to create user"
-            }), 500
+                "error": "User with this email already exists"
+            }), 409
+        db.session.commit()
+        
+        email_filter.add(new_user.email)
+        # The new account must be readable right away, replica or not
+        replica_router.mark_written(new_user.id)
+        
+        return jsonify({
+            "message": "User registered successfully",
+            "user": USER_SCHEMA.dump(new_user)
+        }), 201
         
     except ValidationError as e:
-        # Return validation errors
+        return validation_error(e)
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return hashing_busy(e)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error creating user: {e}")
+        return jsonify({
+            "error": "Failed to create user"
+        }), 500
+
+@auth_blueprint.route("/email-available", methods=['GET'])
+@rate_limiter.limit(*EMAIL_CHECK_LIMITS)
+def emailAvailable():
+    """Whether an email can still be used to sign up
+
+    Answered from the in-memory email filter when it has never seen the
+    email, so most checks don't reach the database. The filter picks up
+    signups in other processes within EMAIL_FILTER_SYNC seconds.
+    """
+    try:
+        email = EmailAvailable(email=request.args.get('email', '')).email
+    except ValidationError as e:
+        return validation_error(e)
+    
+    try:
+        available = not (email_filter.might_contain(email) and _email_registered(email))
         return jsonify({
-            "error": "Validation failed",
-            "details": e.errors()
-        }), 400
+            "email": email,
+            "available": available
+        }), 200
     except Exception as e:
-        # Handle other errors
-        print(f"Unexpected error: {e}")  # Debug log
+        print(f"Email availability error: {e}")
         return jsonify({
-            "error": "Internal server error"
+            "error": "Failed to check email"
         }), 500
 
 @auth_blueprint.route("/forgot-password", methods=['POST'])
@@ -138,9 +186,7 @@ def resetPassword():
 @jwt_required
 def changePassword(current_user):
     try:
-        data = request.get_json()
-
-        password_data = ChangePassword(**data)
+        password_data = parse_json(ChangePassword)
 
         if not current_user.check_password(password_data.oldPassword):
             return jsonify({
@@ -149,19 +195,25 @@ def changePassword(current_user):
         
         # Method 1: Direct attribute assignment (simplest)
         current_user.set_password(password_data.newPassword)
+        # Tokens issued before the change stop working in every worker
+        current_user.revoke_tokens()
         
         # Save to database
         db.session.commit()
+
+        token_cache.revoke_user(current_user.id, current_user.token_version)
         
         return jsonify({
-            "message": "Password changed successfully"
+            "message": "Password changed successfully",
+            "token": current_user.generate_token()
         }), 200
     except ValidationError as e:
-        return jsonify({
-            "error": "Validation failed",
-            "details": e.errors()
-        }), 400
+        return validation_error(e)
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return hashing_busy(e)
     except Exception as e:
+        db.session.rollback()
         print(f"Change Password error: {e}")
         return jsonify({
             "error": "Change Password failed"
@@ -172,11 +224,8 @@ def changePassword(current_user):
 def update_profile(current_user):
     """Update user profile information"""
     try:
-        # Get JSON data from request body
-        data = request.get_json()
-        
-        # Validate data using Pydantic model
-        profile_data = UpdateProfile(**data)
+        # Parse and validate the raw body in one pass
+        profile_data = parse_json(UpdateProfile)
         
         # Method 2: Update multiple fields at once
         # Only update fields that were provided (not None) 
@@ -188,35 +237,35 @@ def update_profile(current_user):
             current_user.lastName = profile_data.lastName
             
         if profile_data.image is not None:
+            # Inline base64 images bloat every profile render - use POST /api/images
+            if profile_data.image.startswith('data:'):
+                return jsonify({
+                    "error": "Upload images through POST /api/images"
+                }), 400
             current_user.image = profile_data.image
 
         if profile_data.links is not None:
-            # Delete existing links for this user
-            UserLink.query.filter_by(user_id=current_user.id).delete()
-            
-            # Add new links
-            for link_data in profile_data.links:
-                if 'platform_id' in link_data and 'url' in link_data:
-                    new_link = UserLink(
-                        user_id=current_user.id,
-                        platform_id=link_data['platform_id'],
-                        url=link_data['url']
-                    )
-                    db.session.add(new_link)
+            # Only write the links that actually changed
+            links = [
+                {'platform_id': link.platform_id, 'url': link.url}
+                for link in profile_data.links
+            ]
+            if any(UserLink.sync_for_user(current_user, links)):
+                # Link-only edits don't touch the users row, bump the profile version anyway
+                current_user.updated_at = datetime.now(timezone.utc)
 
         # Save to database
         db.session.commit()
+        public_profile_cache.invalidate(current_user.id)
+        link_index.invalidate_user(current_user.id)
         
         return jsonify({
             "message": "Profile updated successfully",
-            "user": current_user.to_dict()
+            "user": USER_SCHEMA.dump(current_user)
         }), 200
         
     except ValidationError as e:
-        return jsonify({
-            "error": "Validation failed",
-            "details": e.errors()
-        }), 400
+        return validation_error(e)
     except Exception as e:
         db.session.rollback()
         print(f"Update profile error: {e}")
@@ -225,10 +274,30 @@ def update_profile(current_user):
         }), 500
 
 @auth_blueprint.route("/profile", methods=['GET'])
-@jwt_required
+@jwt_required(load_links=True)
 def get_profile(current_user):
     return jsonify({
-        "user": current_user.to_dict()
+        "user": USER_SCHEMA.dump(current_user)
+    }), 200
+
+@auth_blueprint.route("/profile/clicks", methods=['GET'])
+@jwt_required(stateless=True)
+def get_profile_clicks(current_user):
+    """Clicks per link over the last `days` days (default 30)
+
+    Counts are flushed in the background, so the last few seconds of clicks
+    may not be included yet.
+    """
+    days = min(max(request.args.get('days', 30, type=int), 1), 366)
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = db.session.execute(
+        db.select(LinkClickDaily.link_id, db.func.sum(LinkClickDaily.clicks))
+        .where(LinkClickDaily.user_id == current_user.id, LinkClickDaily.day >= since)
+        .group_by(LinkClickDaily.link_id)
+    ).all()
+    return jsonify({
+        "days": days,
+        "clicks": {str(link_id): int(clicks) for link_id, clicks in rows}
     }), 200
 
 
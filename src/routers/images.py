@@ -0,0 +1,122 @@
+from flask import Blueprint, request, jsonify, send_file
+from src.models.models import User, db
+from src.middleware.auth import jwt_required
+from src.middleware.body_limit import body_limit
+from src.database.image_store import image_store, image_url, VARIANTS, ImageTooLarge, UnsupportedImage
+from src.database.profile_cache import public_profile_cache
+from src.database.jobs import job_queue
+from datetime import datetime, timezone
+import os
+
+images_blueprint = Blueprint("images", __name__)
+
+# Variants are content addressed, so a URL's bytes never change
+VARIANT_MAX_AGE = 365 * 24 * 3600
+# Room for the multipart boundaries and headers around the image itself
+MULTIPART_OVERHEAD = 64 * 1024
+# A due job waiting this long means no job worker is running
+JOB_STALLED_AFTER = float(os.getenv('JOB_STALLED_AFTER', '60'))
+
+
+@job_queue.task('process_image', max_attempts=3)
+def process_image(key):
+    """Background job: resize an uploaded image into its variants"""
+    # Earlier attempts fail quietly, the image stays 'pending' while retried
+    image_store.generate(key, final_attempt=job_queue.final_attempt())
+
+
+def image_payload(key):
+    return {
+        "key": key,
+        "status": image_store.status(key),
+        "variants": {name: image_url(key, name) for name in VARIANTS}
+    }
+
+
+@images_blueprint.route("/", methods=['POST'])
+@body_limit(image_store.max_bytes + MULTIPART_OVERHEAD)
+@jwt_required(stateless=True)
+def uploadImage(current_user):
+    """Upload a profile image - raw image body or a multipart `image` field
+
+    Returns 202 as soon as the original is stored; variants are resized by a
+    background job (poll GET /api/images/<key> for the status).
+    """
+    if request.content_length is not None and request.content_length > image_store.max_bytes:
+        return jsonify({"error": f"Image is larger than {image_store.max_bytes} bytes"}), 413
+
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('image')
+        if upload is None:
+            return jsonify({"error": "Missing 'image' file field"}), 400
+        stream = upload.stream
+    else:
+        stream = request.stream
+
+    try:
+        key = image_store.save(stream)
+    except ImageTooLarge as e:
+        return jsonify({"error": str(e)}), 413
+    except UnsupportedImage as e:
+        return jsonify({"error": str(e)}), 415
+    except Exception as e:
+        print(f"Image upload error: {e}")
+        return jsonify({"error": "Image upload failed"}), 500
+
+    try:
+        # Committed with the users row; runs once the upload request is done
+        if image_store.status(key) != 'ready':
+            job_queue.enqueue('process_image', key=key)
+
+        updated = User.query.filter_by(id=current_user.id).update({
+            "image": key,
+            "updated_at": datetime.now(timezone.utc)
+        })
+        db.session.commit()
+        if not updated:
+            return jsonify({"error": "User not found"}), 401
+        public_profile_cache.invalidate(current_user.id)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Image upload error: {e}")
+        return jsonify({"error": "Image upload failed"}), 500
+
+    return jsonify({
+        "message": "Image uploaded, variants are being generated",
+        "image": image_payload(key)
+    }), 202
+
+
+@images_blueprint.route("/<key>", methods=['GET'])
+def getImage(key):
+    """Processing status and variant URLs of an uploaded image"""
+    if image_store.status(key) is None:
+        return jsonify({"error": "Image not found"}), 404
+
+    payload = image_payload(key)
+    if payload["status"] == 'pending':
+        waiting = job_queue.oldest_due_age()
+        if waiting > JOB_STALLED_AFTER:
+            payload["warning"] = (
+                f"Jobs have been waiting {int(waiting)}s - no job worker seems to be running (flask jobs work)"
+            )
+    return jsonify({"image": payload}), 200
+
+
+@images_blueprint.route("/<key>/<variant>", methods=['GET'])
+def getImageVariant(key, variant):
+    """Serve a resized variant"""
+    status = image_store.status(key)
+    if status is None or variant not in VARIANTS:
+        return jsonify({"error": "Image not found"}), 404
+
+    if status != 'ready':
+        response = jsonify({"error": f"Image is {status}", "status": status})
+        if status == 'pending':
+            response.headers['Retry-After'] = '1'
+        return response, 404
+
+    response = send_file(image_store.variant_path(key, variant), max_age=VARIANT_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,36 @@
+from flask import Blueprint, request, jsonify, redirect
+from src.database.clicks import click_tracker, link_index
+import uuid
+
+links_blueprint = Blueprint("links", __name__)
+
+# Only ever redirect to web URLs, whatever ended up in a link row
+REDIRECT_SCHEMES = ('http://', 'https://')
+
+
+@links_blueprint.route("/<link_id>", methods=['GET'])
+def followLink(link_id):
+    """Count a click and redirect to the link's URL
+
+    The target comes from the in-memory link index and the click goes to a
+    buffer that is flushed in the background, so this never writes to the
+    database.
+    """
+    try:
+        link_uuid = uuid.UUID(link_id)
+    except ValueError:
+        return jsonify({"error": "Link not found"}), 404
+
+    link = link_index.get(link_uuid)
+    if link is None or not link[0].lower().startswith(REDIRECT_SCHEMES):
+        return jsonify({"error": "Link not found"}), 404
+
+    url, user_id = link
+    # HEAD is what link preview bots send - not a visit
+    if request.method == 'GET':
+        click_tracker.record(link_uuid, user_id)
+
+    response = redirect(url, 302)
+    # Every visit must reach us to be counted
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -1,24 +1,159 @@
-from flask import Blueprint
+from flask import Blueprint, Response, request, jsonify
+from sqlalchemy.exc import IntegrityError
+from pydantic import BaseModel, ValidationError, StringConstraints
+from typing import Annotated, Optional
+from src.models.models import Platform, db
+from src.middleware.auth import admin_required
+from src.middleware.utils import parse_json, validation_error
+from src.models.serializers import PLATFORM_SCHEMA
+from src.database.platform_cache import platform_catalog
+from src.database.profile_cache import public_profile_cache
+import uuid
 
 platforms_blueprint = Blueprint("platforms", __name__)
 
+Name = Annotated[str, StringConstraints(min_length=1, max_length=100)]
+Icon = Annotated[str, StringConstraints(min_length=1, max_length=255)]
+Color = Annotated[str, StringConstraints(min_length=1, max_length=50)]
+
+class AddPlatform(BaseModel):
+    name: Name
+    lightIcon: Icon
+    darkIcon: Icon
+    previewColor: Color
+
+class EditPlatform(BaseModel):
+    name: Optional[Name] = None
+    lightIcon: Optional[Icon] = None
+    darkIcon: Optional[Icon] = None
+    previewColor: Optional[Color] = None
+
+
+def parse_platform_id(platform_id):
+    try:
+        return uuid.UUID(platform_id)
+    except ValueError:
+        return None
+
+
 @platforms_blueprint.route("/", methods=['GET'])
 def getAllPlatforms():
-    return "Get all platforms"
+    """List all platforms - served from the in-process catalog cache"""
+    etag = platform_catalog.etag
+
+    # Client already has this version of the catalog (weak match: gzip/br
+    # responses carry W/"<etag>")
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    response = jsonify({
+        "platforms": platform_catalog.all()
+    })
+    response.set_etag(etag)
+    return response, 200
 
 @platforms_blueprint.route("/add", methods=['POST'])
-def addPlatform():
-    return "Add Platform"
+@admin_required
+def addPlatform(current_user):
+    try:
+        platform_data = parse_json(AddPlatform)
+
+        platform = Platform(**platform_data.model_dump())
+        db.session.add(platform)
+        db.session.commit()
+        platform_catalog.invalidate()
+        public_profile_cache.clear()
+
+        return jsonify({
+            "message": "Platform added successfully",
+            "platform": PLATFORM_SCHEMA.dump(platform)
+        }), 201
+    except ValidationError as e:
+        return validation_error(e)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Add platform error: {e}")
+        return jsonify({
+            "error": "Failed to add platform"
+        }), 500
+
+@platforms_blueprint.route("/get/<platform_id>", methods=['GET'])
+def getPlatform(platform_id):
+    platform_uuid = parse_platform_id(platform_id)
+    platform = platform_catalog.get(platform_uuid) if platform_uuid else None
+
+    if not platform:
+        return jsonify({
+            "error": "Platform not found"
+        }), 404
+
+    return jsonify({
+        "platform": platform
+    }), 200
+
+@platforms_blueprint.route("/edit/<platform_id>", methods=['PUT'])
+@admin_required
+def editPlatform(current_user, platform_id):
+    try:
+        platform_data = parse_json(EditPlatform)
+
+        platform_uuid = parse_platform_id(platform_id)
+        platform = db.session.get(Platform, platform_uuid) if platform_uuid else None
+        if not platform:
+            return jsonify({
+                "error": "Platform not found"
+            }), 404
+
+        # Only update fields that were provided (not None)
+        for field, value in platform_data.model_dump(exclude_none=True).items():
+            setattr(platform, field, value)
+
+        db.session.commit()
+        platform_catalog.invalidate()
+        public_profile_cache.clear()
 
-@platforms_blueprint.route("/get/:id", methods=['GET'])
-def getPlatform():
-    return "Get platform"
+        return jsonify({
+            "message": "Platform updated successfully",
+            "platform": PLATFORM_SCHEMA.dump(platform)
+        }), 200
+    except ValidationError as e:
+        return validation_error(e)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Edit platform error: {e}")
+        return jsonify({
+            "error": "Failed to update platform"
+        }), 500
 
-@platforms_blueprint.route("/edit/:id", methods=['PUT'])
-def editPlatform():
-    return "Edit Platform"
+@platforms_blueprint.route("/delete/<platform_id>", methods=['DELETE'])
+@admin_required
+def deletePlatform(current_user, platform_id):
+    try:
+        platform_uuid = parse_platform_id(platform_id)
+        platform = db.session.get(Platform, platform_uuid) if platform_uuid else None
+        if not platform:
+            return jsonify({
+                "error": "Platform not found"
+            }), 404
 
-@platforms_blueprint.route("/delete", methods=['DELETE'])
-def deletePlatform():
-    return "Delete Platform"
+        db.session.delete(platform)
+        db.session.commit()
+        platform_catalog.invalidate()
+        public_profile_cache.clear()
 
+        return jsonify({
+            "message": "Platform deleted successfully"
+        }), 200
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({
+            "error": "Platform is still used by user links"
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f"Delete platform error: {e}")
+        return jsonify({
+            "error": "Failed to delete platform"
+        }), 500
@@ -1,25 +1,98 @@
-from flask import Blueprint, jsonify
-from src.middleware.auth import jwt_required, admin_required
+from flask import Blueprint, Response, request, jsonify
+from src.models.models import User, UserLink, db
+from src.middleware.auth import jwt_required, admin_required, token_cache
 from src.middleware.utils import validate_json
+from src.database.profile_cache import public_profile_cache, render_public_profile, profile_stamp
+from src.database.replicas import replica_router
+from src.database.image_store import image_url
+from src.database.clicks import link_index
+from sqlalchemy.orm import selectinload
+from datetime import datetime
+import base64
+import os
+import uuid
 
 users_blueprint = Blueprint("users", __name__)
 
+PUBLIC_PROFILE_MAX_AGE = int(os.getenv('PUBLIC_PROFILE_MAX_AGE', '60'))
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(created_at, user_id):
+    """Opaque pagination cursor for the last row of a page"""
+    raw = f"{created_at.isoformat()}|{user_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, user_id), raises ValueError on a malformed cursor"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        created_at, user_id = raw.split('|')
+        return datetime.fromisoformat(created_at), uuid.UUID(user_id)
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+
+
 @users_blueprint.route("/", methods=['GET'])
-def getAllUsers(current_user=None):
-    """Get all users - authentication optional"""
-    if current_user:
-        return jsonify({
-            "message": f"Hello {current_user.email}, here are all users",
-            "users": []
-        })
-    else:
-        return jsonify({
-            "message": "Here are all users (public view)",
-            "users": []
-        })
+def getAllUsers():
+    """List users - keyset paginated on (created_at, id), public fields only
+
+    Query params: limit (1-100), cursor (next_cursor of the previous page),
+    include_link_count=true to add each user's number of links.
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    # Project only the public columns - no password hash, no ORM objects
+    query = db.select(
+        User.id, User.firstName, User.lastName, User.image, User.created_at
+    ).order_by(User.created_at, User.id).limit(limit + 1)
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after_created_at, after_id = decode_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+        query = query.where(db.tuple_(User.created_at, User.id) > (after_created_at, after_id))
+
+    rows = db.session.execute(query).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    include_link_count = request.args.get('include_link_count', '').lower() == 'true'
+    link_counts = {}
+    if include_link_count and rows:
+        # One grouped query for the whole page
+        link_counts = dict(db.session.execute(
+            db.select(UserLink.user_id, db.func.count(UserLink.id))
+            .where(UserLink.user_id.in_([row.id for row in rows]))
+            .group_by(UserLink.user_id)
+        ).all())
+
+    users = []
+    for row in rows:
+        user = {
+            "id": str(row.id),
+            "firstName": row.firstName,
+            "lastName": row.lastName,
+            "image": image_url(row.image),
+            "created_at": row.created_at.isoformat()
+        }
+        if include_link_count:
+            user["link_count"] = link_counts.get(row.id, 0)
+        users.append(user)
+
+    return jsonify({
+        "users": users,
+        "next_cursor": encode_cursor(rows[-1].created_at, rows[-1].id) if has_more else None
+    }), 200
 
 @users_blueprint.route("/<user_id>", methods=['GET'])
-@jwt_required
+@jwt_required(stateless=True)
 def getUser(current_user, user_id):
     """Get specific user - authentication required"""
     return jsonify({
@@ -27,9 +100,46 @@ def getUser(current_user, user_id):
         "requested_by": current_user.email
     })
 
+@users_blueprint.route("/<user_id>/public", methods=['GET'])
+def getPublicProfile(user_id):
+    """Public share page data - no authentication, served from the rendered cache"""
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"error": "User not found"}), 404
+
+    # Served without a query while fresh (PUBLIC_PROFILE_CACHE_FRESH)
+    cached = public_profile_cache.get(user_uuid)
+    if cached is None:
+        # A profile edited moments ago is read from the primary
+        with replica_router.for_user(user_uuid):
+            # Cheap version check: an older render is only used if it is current
+            row = db.session.execute(db.select(User.updated_at).where(User.id == user_uuid)).first()
+            if row is None:
+                return jsonify({"error": "User not found"}), 404
+
+            cached = public_profile_cache.get(user_uuid, profile_stamp(row.updated_at))
+            if cached is None:
+                user = db.session.get(User, user_uuid, options=[selectinload(User.user_links)])
+                if not user:
+                    return jsonify({"error": "User not found"}), 404
+
+                body = render_public_profile(user)
+                etag = public_profile_cache.put(user_uuid, profile_stamp(user.updated_at), body)
+                cached = body, etag
+    body, etag = cached
+
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f'public, max-age={PUBLIC_PROFILE_MAX_AGE}'
+    return response
+
 @users_blueprint.route("/<user_id>", methods=['PUT'])
 @validate_json
-@jwt_required
+@jwt_required(stateless=True)
 def editUser(current_user, user_id):
     """Edit user - authentication required + JSON validation"""
     return jsonify({
@@ -37,10 +147,33 @@ def editUser(current_user, user_id):
     })
 
 @users_blueprint.route("/<user_id>", methods=['DELETE'])
-@admin_required  # Only admins can delete users
+@admin_required(stateless=True)  # Only admins can delete users
 def deleteUser(current_user, user_id):
     """Delete user - admin privileges required"""
-    return jsonify({
-        "message": f"User {user_id} deleted by admin {current_user.email}"
-    })
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        return jsonify({"error": "User not found"}), 404
+
+    try:
+        user = db.session.get(User, user_uuid)
+        if not user:
+            return jsonify({"error": "User not found"}), 404
+
+        UserLink.query.filter_by(user_id=user_uuid).delete()
+        db.session.delete(user)
+        db.session.commit()
 
+        # Tokens already issued to this user must stop working right away
+        token_cache.revoke_user(user_uuid)
+        public_profile_cache.invalidate(user_uuid)
+        link_index.invalidate_user(user_uuid)
+        replica_router.mark_written(user_uuid)
+
+        return jsonify({
+            "message": f"User {user_id} deleted by admin {current_user.email}"
+        })
+    except Exception as e:
+        db.session.rollback()
+        print(f"Delete user error: {e}")
+        return jsonify({"error": "Failed to delete user"}), 500
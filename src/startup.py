@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+import os
+import sys
+import time
+import click
+
+# Set before anything else is imported: the interpreter start, not the first
+# create_app() call, is when a cold start begins for the caller
+PROCESS_STARTED = time.perf_counter()
+
+
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes', 'on')
+
+
+class StartupProfile:
+    """Wall time of each create_app() phase
+
+    Kept on app.extensions['startup']; STARTUP_PROFILE=true also prints it to
+    stderr once the app is built. benchmarks/cold_start.py adds per-module
+    import times and checks the total against a budget.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # (name, seconds)
+        self.total = None
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+        if env_flag('STARTUP_PROFILE', 'false'):
+            print(self.format(), file=sys.stderr)
+
+    def to_dict(self):
+        return {
+            'imports_ms': round((self.started - PROCESS_STARTED) * 1000, 1),
+            'create_app_ms': round((self.total or 0) * 1000, 1),
+            'phases_ms': {name: round(seconds * 1000, 1) for name, seconds in self.phases},
+        }
+
+    def format(self):
+        data = self.to_dict()
+        lines = [f"startup: imports {data['imports_ms']}ms, create_app {data['create_app_ms']}ms"]
+        lines += [f"  {name:<14} {ms:8.1f}ms" for name, ms in data['phases_ms'].items()]
+        return '\n'.join(lines)
+
+
+def ensure_migrate(app, db):
+    """Set up Flask-Migrate on `app` once and return its extension
+
+    create_app() leaves it out (see LazyMigrateGroup); anything that migrates
+    outside `flask db`, like the gunicorn master, calls this first.
+    """
+    if 'migrate' not in app.extensions:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    return app.extensions['migrate']
+
+
+# Newest first: (revision, what it added - a table, ('column', table, name)
+# or ('index', table, name)). A schema built by db.create_all() has everything
+# its models had, so the newest marker present is the revision it matches.
+SCHEMA_MARKERS = (
+    ('d81f5a3c9e64', ('column', 'users', 'token_version')),
+    ('b2e8f4c61d07', 'link_health'),
+    ('a7d3e1b94c62', 'link_clicks_daily'),
+    ('f19c6d3e8a27', 'jobs'),
+    ('e4a7b2c9d053', ('index', 'user_links', 'ix_user_links_user_id_position')),
+    ('c52d9e7a1f48', ('index', 'users', 'ix_users_created_at_id')),
+    ('8a4e6c0f2d31', ('column', 'user_links', 'position')),
+)
+INITIAL_REVISION = '3f1c2a9d7b10'
+
+
+def stamp_existing_schema(app, db, directory=None):
+    """Stamp a database built by db.create_all() with the revision it matches
+
+    Such a database has the tables but no alembic_version, so `flask db
+    upgrade` would start from the initial migration and fail on the existing
+    tables. This is `flask db stamp <revision>` with the revision worked out
+    from the schema; run it before upgrading. Databases that are empty or
+    already versioned are left alone. Returns the stamped revision or None
+    (needs an app context).
+    """
+    from flask_migrate import stamp
+    from sqlalchemy import inspect
+
+    ensure_migrate(app, db)
+    with db.engine.connect() as connection:
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        if 'alembic_version' in tables or 'users' not in tables:
+            return None
+
+        def present(marker):
+            if isinstance(marker, str):
+                return marker in tables
+            kind, table, name = marker
+            if table not in tables:
+                return False
+            found = inspector.get_columns(table) if kind == 'column' else inspector.get_indexes(table)
+            return any(item['name'] == name for item in found)
+
+        revision = next((revision for revision, marker in SCHEMA_MARKERS if present(marker)), INITIAL_REVISION)
+    stamp(directory=directory, revision=revision)
+    return revision
+
+
+class LazyMigrateGroup(click.Group):
+    """`flask db` that imports Flask-Migrate only when the command runs
+
+    flask_migrate pulls in Alembic, about a third of our import time, and
+    only migration commands need it. Running `flask db ...` sets up
+    Flask-Migrate and hands the arguments to its real command group.
+    """
+
+    def __init__(self, app, db):
+        super().__init__('db', help='Perform database migrations.')
+        self._app = app
+        self._db = db
+
+    def make_context(self, info_name, args, parent=None, **extra):
+        from flask_migrate.cli import db as db_cli_group
+        ensure_migrate(self._app, self._db)
+        return db_cli_group.make_context(info_name, args, parent=parent, **extra)
@@ -0,0 +1,10 @@
+import sys
+import os
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.main import create_app
+
+# Production entry point: gunicorn -c gunicorn.conf.py src.wsgi:app
+# The schema is handled by migrations in the gunicorn master, not per worker.
+app = create_app(create_schema=False)